@@ -0,0 +1,110 @@
+from PySide6.QtCore import QSize, Qt
+from PySide6.QtGui import QImage, QImageReader
+from PySide6.QtQuick import QQuickImageProvider
+import base64
+
+from backend.lru_cache import LRUCache
+
+
+def encode_track_id(file_path):
+    """Encode a file path so it survives as the id part of an image:// URL"""
+    return base64.urlsafe_b64encode(file_path.encode('utf-8')).decode('ascii')
+
+
+def decode_track_id(track_id):
+    """Reverse encode_track_id"""
+    return base64.urlsafe_b64decode(track_id.encode('ascii')).decode('utf-8')
+
+
+class AlbumArtProvider(QQuickImageProvider):
+    """Serves album art to QML as image://albumart/<track> from memory
+
+    Decoded images are cached per cover and requested size, so rows sharing a
+    cover and repeated scrolling never go back to the filesystem. On a miss the
+    image is decoded straight at the size QML asked for through sourceSize.
+    Requests arrive on QML's image loading threads, which also extract covers
+    seen for the first time. Tracks without a cover get the fallback image.
+    """
+
+    def __init__(self, resolve_art_hash, art_store, fallback_path="", max_images=256, max_bytes=64 * 1024 * 1024):
+        super().__init__(QQuickImageProvider.Image, QQuickImageProvider.ForceAsynchronousImageLoading)
+        self._resolve_art_hash = resolve_art_hash  # Callable(file_path) -> art hash or ""
+        self._art_store = art_store
+        self._fallback_path = fallback_path
+        # (art hash, width, height) to QImage, bounded by decoded size so a few full covers cannot crowd memory
+        self._images = LRUCache(max_entries=max_images, max_bytes=max_bytes,
+                                sizeof=lambda image: image.sizeInBytes())
+        self._track_hashes = LRUCache(max_entries=max_images * 8)  # File path to art hash
+
+    def requestImage(self, track_id, size, requestedSize):
+        """Return the cover for a track scaled to fit requestedSize"""
+        try:
+            file_path = decode_track_id(track_id)
+            art_hash = self._art_hash_for(file_path)
+            if not art_hash and not self._fallback_path:
+                return QImage()
+
+            width = max(requestedSize.width(), 0) if requestedSize.isValid() else 0
+            height = max(requestedSize.height(), 0) if requestedSize.isValid() else 0
+            key = (art_hash, width, height)
+
+            image = self._images.get(key)
+            if image is None:
+                image = self._decode(art_hash, width, height)
+                if image.isNull():
+                    return image
+                self._images.put(key, image)
+
+            if size is not None:
+                size.setWidth(image.width())
+                size.setHeight(image.height())
+            return image
+        except Exception as e:
+            print(f"Error providing album art for {track_id}: {e}")
+            return QImage()
+
+    def invalidate(self):
+        """Forget track to cover lookups, e.g. after the media folder changed"""
+        self._track_hashes.clear()
+
+    def image_cache_stats(self):
+        """Counters of the decoded image cache"""
+        return self._images.stats()
+
+    def lookup_cache_stats(self):
+        """Counters of the track to cover lookups"""
+        return self._track_hashes.stats()
+
+    def _art_hash_for(self, file_path):
+        """Map a track to its cover hash, remembering recent answers"""
+        art_hash = self._track_hashes.get(file_path)
+        if art_hash is not None:
+            return art_hash
+
+        art_hash = self._resolve_art_hash(file_path)
+        self._track_hashes.put(file_path, art_hash)
+        return art_hash
+
+    def _decode(self, art_hash, width, height):
+        """Decode the smallest stored variant that covers the requested size"""
+        if not art_hash:
+            path = self._fallback_path
+        else:
+            wants_thumb = 0 < max(width, height) <= self._art_store.THUMBNAIL_SIZE
+            path = self._art_store.path_for(art_hash, "thumb" if wants_thumb else "full")
+        if not path:
+            return QImage()
+
+        reader = QImageReader(path)
+        reader.setDecideFormatFromContent(True)
+        reader.setAutoTransform(True)
+
+        # Let the codec scale while decoding (JPEG can skip most of the work)
+        source = reader.size()
+        if source.isValid() and (width or height):
+            target = QSize(width or source.width(), height or source.height())
+            scaled = source.scaled(target, Qt.KeepAspectRatio)
+            if scaled.width() < source.width():
+                reader.setScaledSize(scaled)
+
+        return reader.read()
@@ -0,0 +1,194 @@
+from PySide6.QtCore import QObject, Qt
+from PySide6.QtGui import QImage, QImageReader
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+
+
+class AlbumArtStore(QObject):
+    """Persistent album art cache keyed by a hash of the image content
+
+    Tracks sharing a cover share one entry. Each entry keeps the original image
+    plus pre-scaled "full" and "thumb" variants that are generated on a
+    background thread. The store is capped by total bytes and evicts the least
+    recently used covers first.
+    """
+
+    THUMBNAIL_SIZE = 128   # Pixels; list rows display covers at about 60px
+    FULL_SIZE = 1024       # Pixels; larger originals are scaled down for the media room
+
+    def __init__(self, store_dir, max_bytes=256 * 1024 * 1024):
+        super().__init__()
+        self._store_dir = store_dir
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # Hash to {variant: filename}, least recently used first
+        self._sizes = {}               # Filename to size in bytes
+        self._total_bytes = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="album-art")
+        self._load_entries()
+
+    def _load_entries(self):
+        """Rebuild the entry table from the files already in the store"""
+        try:
+            os.makedirs(self._store_dir, exist_ok=True)
+
+            files = []
+            with os.scandir(self._store_dir) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.endswith('.tmp'):
+                        stat = entry.stat()
+                        files.append((stat.st_mtime, entry.name, stat.st_size))
+
+            # File mtimes are bumped on use, so oldest first approximates LRU order
+            for _, name, size in sorted(files):
+                art_hash, variant = self._parse_name(name)
+                self._entries.setdefault(art_hash, {})[variant] = name
+                self._entries.move_to_end(art_hash)
+                self._sizes[name] = size
+                self._total_bytes += size
+        except OSError as e:
+            print(f"Error loading album art store: {e}")
+
+    def _parse_name(self, name):
+        """Split a store filename into (hash, variant)"""
+        stem = name.split('.', 1)[0]
+        if stem.endswith('_thumb'):
+            return stem[:-len('_thumb')], "thumb"
+        if stem.endswith('_full'):
+            return stem[:-len('_full')], "full"
+        return stem, "source"
+
+    def put(self, data, mime=""):
+        """Store image bytes and return their content hash"""
+        art_hash = hashlib.sha1(data).hexdigest()
+        mime = mime.lower()
+        ext = {"image/jpeg": "jpg", "image/jpg": "jpg", "image/png": "png", "image/gif": "gif"}.get(mime, "img")
+        name = f"{art_hash}.{ext}"
+
+        # Held across check, write and insert so two scanner threads storing
+        # the same cover cannot both count its bytes
+        with self._lock:
+            if art_hash in self._entries:
+                self._entries.move_to_end(art_hash)
+                return art_hash
+
+            try:
+                self._write_file(name, data)
+            except OSError as e:
+                print(f"Error writing album art {name}: {e}")
+                return ""
+
+            self._entries[art_hash] = {"source": name}
+            self._add_size(name)
+
+        self._executor.submit(self._generate_variants, art_hash, name)
+        self._evict()
+        return art_hash
+
+    def path_for(self, art_hash, variant="full"):
+        """Return the best available file for a variant, or "" if the cover is unknown"""
+        with self._lock:
+            files = self._entries.get(art_hash)
+            if not files:
+                return ""
+            self._entries.move_to_end(art_hash)
+
+            # Fall back to larger variants until the scaled ones are generated
+            order = ("thumb", "full", "source") if variant == "thumb" else ("full", "source")
+            for candidate in order:
+                if candidate in files:
+                    return os.path.join(self._store_dir, files[candidate])
+        return ""
+
+    def contains(self, art_hash):
+        with self._lock:
+            return art_hash in self._entries
+
+    def touch(self, art_hash):
+        """Record a use of a cover so it survives eviction across restarts"""
+        with self._lock:
+            files = list(self._entries.get(art_hash, {}).values())
+        for name in files:
+            try:
+                os.utime(os.path.join(self._store_dir, name))
+            except OSError:
+                pass
+
+    def shutdown(self):
+        """Stop the variant worker"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _write_file(self, name, data):
+        """Write atomically so a crash never leaves a truncated image behind"""
+        path = os.path.join(self._store_dir, name)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _add_size(self, name):
+        """Account for a file in the byte total; caller holds the lock"""
+        try:
+            size = os.path.getsize(os.path.join(self._store_dir, name))
+        except OSError:
+            size = 0
+        self._sizes[name] = size
+        self._total_bytes += size
+
+    def _generate_variants(self, art_hash, source_name):
+        """Worker task: write the thumbnail and, for large covers, a scaled full image"""
+        try:
+            source_path = os.path.join(self._store_dir, source_name)
+            image = QImage(source_path)
+            if image.isNull():
+                # Fall back to sniffing the format when the MIME type was wrong
+                reader = QImageReader(source_path)
+                reader.setDecideFormatFromContent(True)
+                image = reader.read()
+            if image.isNull():
+                return
+
+            variants = {"thumb": self.THUMBNAIL_SIZE}
+            if max(image.width(), image.height()) > self.FULL_SIZE:
+                variants["full"] = self.FULL_SIZE
+
+            for variant, size in variants.items():
+                scaled = image.scaled(size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+                name = f"{art_hash}_{variant}.jpg"
+                tmp_path = os.path.join(self._store_dir, name + '.tmp')
+                if not scaled.save(tmp_path, "JPG", 85):
+                    continue
+                os.replace(tmp_path, os.path.join(self._store_dir, name))
+
+                with self._lock:
+                    evicted = art_hash not in self._entries
+                    if not evicted:
+                        self._entries[art_hash][variant] = name
+                        self._add_size(name)
+                if evicted:
+                    os.remove(os.path.join(self._store_dir, name))
+                    return
+
+            self._evict()
+        except Exception as e:
+            print(f"Error generating album art variants for {art_hash}: {e}")
+
+    def _evict(self):
+        """Delete least recently used covers until the store is under its byte cap"""
+        removed = []
+        with self._lock:
+            # Always keep the most recent cover, even if it alone exceeds the cap
+            while self._total_bytes > self._max_bytes and len(self._entries) > 1:
+                _, files = self._entries.popitem(last=False)
+                for name in files.values():
+                    self._total_bytes -= self._sizes.pop(name, 0)
+                    removed.append(name)
+
+        for name in removed:
+            try:
+                os.remove(os.path.join(self._store_dir, name))
+            except OSError as e:
+                print(f"Warning: Could not remove album art {name}: {e}")
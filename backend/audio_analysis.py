@@ -0,0 +1,180 @@
+"""Audio analysis run in worker processes: loudness and waveform peaks
+
+Functions here are submitted to a ProcessPoolExecutor, so they must stay
+importable without Qt and take and return only picklable values. Audio is
+decoded by the ffmpeg command line tool and streamed in chunks, so memory
+use does not grow with track length.
+"""
+import math
+import os
+import shutil
+import subprocess
+import tempfile
+
+try:
+    import numpy as np
+    import scipy.signal as signal
+    ANALYSIS_AVAILABLE = True
+except ImportError:
+    ANALYSIS_AVAILABLE = False
+    print("Warning: numpy or scipy not available. Loudness and waveform analysis disabled.")
+
+FFMPEG = shutil.which("ffmpeg")
+if FFMPEG is None:
+    print("Warning: ffmpeg not found. Loudness and waveform analysis disabled.")
+
+# ReplayGain 2.0 reference level; gains bring tracks to this loudness
+REFERENCE_LOUDNESS = -18.0
+
+# ITU-R BS.1770-4 K-weighting filter at 48 kHz: high shelf, then high pass
+_LOUDNESS_SAMPLE_RATE = 48000
+_K_WEIGHTING = [
+    [1.53512485958697, -2.69169618940638, 1.19839281085285, 1.0, -1.69065929318241, 0.73248077421585],
+    [1.0, -2.0, 1.0, 1.0, -1.99004745483398, 0.99007225036621],
+]
+
+# Gating blocks are 400 ms with 75% overlap, built from 100 ms hops
+_HOP = _LOUDNESS_SAMPLE_RATE // 10
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+
+# Waveforms are decoded at a low rate, which is plenty for drawing peaks
+WAVEFORM_POINTS = 512
+_WAVEFORM_SAMPLE_RATE = 8000
+_WAVEFORM_WINDOW = 256
+
+
+class DecodeError(Exception):
+    """The file could not be decoded"""
+
+
+def analysis_available():
+    """True if numpy, scipy and ffmpeg are all present"""
+    return ANALYSIS_AVAILABLE and FFMPEG is not None
+
+
+def lower_priority():
+    """Pool initializer: keep analysis from competing with playback and the UI"""
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def iter_pcm(path, sample_rate, channels, chunk_seconds=10):
+    """Decode a file and yield float32 chunks shaped (frames, channels)"""
+    if FFMPEG is None:
+        raise DecodeError("ffmpeg not found")
+
+    command = [FFMPEG, "-nostdin", "-v", "error", "-i", path, "-map", "0:a:0",
+               "-f", "f32le", "-ac", str(channels), "-ar", str(sample_rate), "-"]
+    # Errors go to a file: a damaged track can log more than a pipe holds,
+    # and ffmpeg would block on stderr while we wait on stdout
+    errors = tempfile.TemporaryFile()
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=errors)
+    frame_bytes = channels * 4
+    chunk_bytes = int(sample_rate * chunk_seconds) * frame_bytes
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            usable = len(data) - len(data) % frame_bytes
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.float32).reshape(-1, channels)
+
+        if process.wait() != 0:
+            errors.seek(0)
+            message = errors.read(200).decode(errors="replace").strip()
+            raise DecodeError(message or "ffmpeg failed")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors.close()
+
+
+def _block_loudness(mean_square):
+    return -0.691 + 10 * np.log10(np.maximum(mean_square, 1e-20))
+
+
+def analyze_loudness(path):
+    """Gated integrated loudness (BS.1770) and sample peak of a track
+
+    Returns {"loudness": LUFS or None for silence, "peak": linear sample
+    peak, "gain": dB to reach REFERENCE_LOUDNESS without clipping}.
+    """
+    sos = np.array(_K_WEIGHTING)
+    zi = None
+    leftover = np.zeros((0, 2), dtype=np.float64)
+    hop_energy = []
+    peak = 0.0
+
+    for chunk in iter_pcm(path, _LOUDNESS_SAMPLE_RATE, 2):
+        peak = max(peak, float(np.abs(chunk).max()))
+        if zi is None:
+            zi = np.zeros((sos.shape[0], 2, chunk.shape[1]))
+        filtered, zi = signal.sosfilt(sos, chunk, axis=0, zi=zi)
+
+        # Sum of squares over both channels per 100 ms hop
+        samples = np.concatenate((leftover, filtered)) if len(leftover) else filtered
+        usable = len(samples) // _HOP * _HOP
+        if usable:
+            hop_energy.append(np.square(samples[:usable]).reshape(-1, _HOP, samples.shape[1]).sum(axis=(1, 2)))
+        leftover = samples[usable:]
+
+    if not hop_energy:
+        return {"loudness": None, "peak": peak, "gain": 0.0}
+
+    energy = np.concatenate(hop_energy)
+    if len(energy) >= 4:
+        blocks = (energy[:-3] + energy[1:-2] + energy[2:-1] + energy[3:]) / (4 * _HOP)
+    else:
+        blocks = np.array([energy.sum() / (len(energy) * _HOP)])
+
+    blocks = blocks[_block_loudness(blocks) > _ABSOLUTE_GATE]
+    if not len(blocks):
+        return {"loudness": None, "peak": peak, "gain": 0.0}
+    relative_gate = _block_loudness(blocks.mean()) + _RELATIVE_GATE
+    blocks = blocks[_block_loudness(blocks) > relative_gate]
+    loudness = float(_block_loudness(blocks.mean()))
+
+    gain = REFERENCE_LOUDNESS - loudness
+    if peak > 0:
+        gain = min(gain, -20 * math.log10(peak))
+    return {"loudness": loudness, "peak": peak, "gain": gain}
+
+
+def compute_waveform(path, points=WAVEFORM_POINTS):
+    """Min/max peaks over points equal slices of a track
+
+    Returns int8 bytes of interleaved (min, max) pairs scaled to -127..127.
+    """
+    mins = []
+    maxs = []
+    leftover = np.zeros(0, dtype=np.float32)
+
+    for chunk in iter_pcm(path, _WAVEFORM_SAMPLE_RATE, 1):
+        samples = np.concatenate((leftover, chunk[:, 0])) if len(leftover) else chunk[:, 0]
+        usable = len(samples) // _WAVEFORM_WINDOW * _WAVEFORM_WINDOW
+        if usable:
+            windows = samples[:usable].reshape(-1, _WAVEFORM_WINDOW)
+            mins.append(windows.min(axis=1))
+            maxs.append(windows.max(axis=1))
+        leftover = samples[usable:]
+
+    if len(leftover):
+        mins.append(np.array([leftover.min()]))
+        maxs.append(np.array([leftover.max()]))
+    if not mins:
+        raise DecodeError("no audio")
+
+    mins = np.concatenate(mins)
+    maxs = np.concatenate(maxs)
+    edges = np.linspace(0, len(mins), points + 1).astype(np.int64)[:-1]
+
+    pairs = np.empty(points * 2, dtype=np.int8)
+    pairs[0::2] = np.clip(np.round(np.minimum.reduceat(mins, edges) * 127), -127, 127)
+    pairs[1::2] = np.clip(np.round(np.maximum.reduceat(maxs, edges) * 127), -127, 127)
+    return pairs.tobytes()
@@ -0,0 +1,399 @@
+from PySide6.QtCore import QObject, Slot
+import functools
+import math
+import threading
+import time
+
+# Check if audio processing libraries are available
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    print("Warning: numpy not available. Built-in equalizer and spectrum analyzer disabled.")
+
+# QAudioBufferOutput, which hands decoded audio to Python, is new in Qt 6.8
+try:
+    from PySide6.QtMultimedia import QAudioBufferOutput, QAudioFormat
+    AUDIO_TAP_AVAILABLE = NUMPY_AVAILABLE
+except ImportError:
+    AUDIO_TAP_AVAILABLE = False
+    print("Warning: QAudioBufferOutput requires Qt 6.8. Built-in equalizer and spectrum analyzer disabled.")
+
+try:
+    import scipy.signal as signal
+    import sounddevice as sd
+    AUDIO_PROCESSOR_AVAILABLE = AUDIO_TAP_AVAILABLE
+except ImportError:
+    AUDIO_PROCESSOR_AVAILABLE = False
+    print("Warning: scipy or sounddevice not available. Built-in equalizer disabled.")
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+BLOCK_SIZE = 1024  # Frames per output block, about 23 ms at 44.1 kHz
+
+# Same bell filter width as the EasyEffects presets
+BAND_Q = 1.504760237537245
+
+
+@functools.lru_cache(maxsize=2048)
+def peaking_section(frequency, gain_db, q=BAND_Q, sample_rate=SAMPLE_RATE):
+    """One bell filter as a normalized second-order section (b0, b1, b2, 1, a1, a2)
+
+    Cached: slider values are rounded to 0.1 dB, so dragging a band back and
+    forth keeps hitting the same few hundred coefficient sets.
+    """
+    a = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * frequency / sample_rate
+    alpha = math.sin(w0) / (2 * q)
+    cos_w0 = math.cos(w0)
+    a0 = 1 + alpha / a
+    return ((1 + alpha * a) / a0, -2 * cos_w0 / a0, (1 - alpha * a) / a0,
+            1.0, -2 * cos_w0 / a0, (1 - alpha / a) / a0)
+
+
+def frequency_response(sections, frequencies, sample_rate=SAMPLE_RATE):
+    """Combined magnitude in dB of a cascade of second-order sections
+
+    All sections are evaluated at all frequencies in one go: each row's
+    numerator and denominator are polynomials in z^-1, so a matrix product
+    with [1, z^-1, z^-2] gives every section's response at once.
+    """
+    sections = np.asarray(sections, dtype=np.float64)
+    z = np.exp(-2j * np.pi * np.asarray(frequencies, dtype=np.float64) / sample_rate)
+    powers = np.stack((np.ones_like(z), z, z * z))
+    response = np.prod((sections[:, :3] @ powers) / (sections[:, 3:] @ powers), axis=0)
+    return 20 * np.log10(np.maximum(np.abs(response), 1e-12))
+
+
+def _preamp(gains):
+    """Headroom so boosted bands do not clip at full volume"""
+    return 10 ** (-max(max(gains, default=0.0), 0.0) / 20)
+
+
+class RingBuffer:
+    """Fixed-size FIFO of audio frames; when full the oldest frames are dropped"""
+
+    def __init__(self, frames, channels):
+        self._data = np.zeros((frames, channels), dtype=np.float32)
+        self._read = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def write(self, samples):
+        """Append frames shaped (n, channels); returns how many old frames were dropped"""
+        capacity = len(self._data)
+        if len(samples) > capacity:
+            samples = samples[-capacity:]
+        n = len(samples)
+
+        with self._lock:
+            dropped = max(self._count + n - capacity, 0)
+            if dropped:
+                self._read = (self._read + dropped) % capacity
+                self._count -= dropped
+
+            start = (self._read + self._count) % capacity
+            first = min(n, capacity - start)
+            self._data[start:start + first] = samples[:first]
+            self._data[:n - first] = samples[first:]
+            self._count += n
+        return dropped
+
+    def read(self, out):
+        """Move up to len(out) frames into out; returns how many were available"""
+        capacity = len(self._data)
+        with self._lock:
+            n = min(len(out), self._count)
+            first = min(n, capacity - self._read)
+            out[:first] = self._data[self._read:self._read + first]
+            out[first:n] = self._data[:n - first]
+            self._read = (self._read + n) % capacity
+            self._count -= n
+        return n
+
+    def latest(self, out):
+        """Copy the newest len(out) frames into out without consuming them; returns the count"""
+        capacity = len(self._data)
+        with self._lock:
+            n = min(len(out), self._count)
+            start = (self._read + self._count - n) % capacity
+            first = min(n, capacity - start)
+            out[:first] = self._data[start:start + first]
+            out[first:n] = self._data[:n - first]
+        return n
+
+    def clear(self):
+        with self._lock:
+            self._read = 0
+            self._count = 0
+
+
+class AudioTap(QObject):
+    """Decoded audio of the playing track, shared by the equalizer and the spectrum analyzer
+
+    A media player takes a single QAudioBufferOutput, so consumers subscribe
+    here instead. The buffer output is only attached to the player while
+    someone is subscribed; each buffer is converted to a float32 array shaped
+    (frames, CHANNELS) once and handed to every consumer on the GUI thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._player = None
+        self._consumers = []
+        self._buffer_output = QAudioBufferOutput(self._output_format(), self)
+        self._buffer_output.audioBufferReceived.connect(self._handle_audio_buffer)
+
+    @staticmethod
+    def _output_format():
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(SAMPLE_RATE)
+        audio_format.setChannelCount(CHANNELS)
+        audio_format.setSampleFormat(QAudioFormat.SampleFormat.Float)
+        return audio_format
+
+    def set_source(self, player):
+        """Tap a different media player, e.g. after a gapless handover"""
+        if player is self._player:
+            return
+        if self._consumers and self._player is not None:
+            self._player.setAudioBufferOutput(None)
+        self._player = player
+        if self._consumers and self._player is not None:
+            self._player.setAudioBufferOutput(self._buffer_output)
+
+    def subscribe(self, callback):
+        """Call callback(samples) for every decoded buffer from now on"""
+        if callback in self._consumers:
+            return
+        self._consumers.append(callback)
+        if len(self._consumers) == 1 and self._player is not None:
+            self._player.setAudioBufferOutput(self._buffer_output)
+
+    def unsubscribe(self, callback):
+        if callback not in self._consumers:
+            return
+        self._consumers.remove(callback)
+        if not self._consumers and self._player is not None:
+            self._player.setAudioBufferOutput(None)
+
+    def _handle_audio_buffer(self, buffer):
+        try:
+            samples = np.frombuffer(buffer.constData(), dtype=np.float32,
+                                    count=buffer.frameCount() * CHANNELS).reshape(-1, CHANNELS)
+        except Exception as e:
+            print(f"Error reading audio buffer: {e}")
+            return
+        for callback in list(self._consumers):
+            callback(samples)
+
+
+class AudioProcessor(QObject):
+    """Built-in 10-band equalizer for systems without a system-wide one
+
+    Decoded audio comes from the shared AudioTap while the media player's
+    own output is muted. Blocks are filtered through a
+    cascade of bell filters (one second-order section per band) whose state
+    carries over between blocks, and played through sounddevice. The filter
+    only runs while the equalizer is enabled, playback is running and at
+    least one band is not flat; otherwise Qt plays the audio directly.
+    """
+
+    def __init__(self, frequencies, parent=None):
+        super().__init__(parent)
+        self._frequencies = list(frequencies)
+        self._gains = [0.0] * len(self._frequencies)
+        # (sections, preamp), replaced as one object so the audio thread never sees a mix
+        self._filter = (self._design(self._gains), 1.0)
+        self._last_design_us = 0.0
+        self._zi = None            # Filter state, only touched by the audio thread
+        self._reset_state = False  # Set by flush(), consumed by the next callback
+        self._volume = 1.0
+
+        self._enabled = True
+        self._running = False
+        self._tapping = False
+        self._player = None
+        self._stream = None
+        self._tap = None
+        self._ring = RingBuffer(SAMPLE_RATE, CHANNELS)  # One second of slack
+        self._block = np.zeros((BLOCK_SIZE, CHANNELS), dtype=np.float32)
+
+        # Per-block processing time, written by the audio callback thread
+        self._block_count = 0
+        self._last_block_ms = 0.0
+        self._average_block_ms = 0.0
+        self._max_block_ms = 0.0
+        self._underruns = 0
+        self._overruns = 0
+
+    def _design(self, gains):
+        """Second-order sections for every band"""
+        return np.array([peaking_section(frequency, gain, BAND_Q, SAMPLE_RATE)
+                         for frequency, gain in zip(self._frequencies, gains)])
+
+    # -------- Control, from the GUI thread --------
+
+    def set_gains(self, gains):
+        """Apply band gains in dB, redesigning only the bands that changed"""
+        gains = [float(g) for g in gains]
+        changed = [i for i, gain in enumerate(gains) if gain != self._gains[i]]
+        if not changed:
+            return
+
+        started = time.perf_counter()
+        sos = self._filter[0].copy()
+        for i in changed:
+            sos[i] = peaking_section(self._frequencies[i], gains[i], BAND_Q, SAMPLE_RATE)
+        self._gains = gains
+        # Filter state is kept: the sections keep their shape, so there is no click
+        self._filter = (sos, _preamp(gains))
+        self._last_design_us = (time.perf_counter() - started) * 1e6
+        self._update_state()
+
+    def set_band(self, index, gain):
+        """Apply one band's gain in dB, e.g. while its slider is dragged"""
+        gains = list(self._gains)
+        gains[index] = gain
+        self.set_gains(gains)
+
+    def set_enabled(self, enabled):
+        self._enabled = bool(enabled)
+        self._update_state()
+
+    def set_volume(self, volume):
+        """Output volume applied after filtering, since the player's own output is muted"""
+        self._volume = float(volume)
+
+    def set_tap(self, tap):
+        """The AudioTap that delivers the player's decoded audio"""
+        if self._tapping:
+            self._release_player()
+        self._tap = tap
+        if self._tapping:
+            self._capture_player()
+
+    def set_source(self, player):
+        """Mute a different media player while filtering, e.g. after a gapless handover"""
+        if player is self._player:
+            return
+        if self._tapping:
+            self._release_player()
+        self._player = player
+        if self._tapping:
+            self._capture_player()
+
+    @Slot()
+    def start(self):
+        self._running = True
+        self._update_state()
+
+    @Slot()
+    def stop(self):
+        self._running = False
+        self._update_state()
+
+    def flush(self):
+        """Drop queued audio and filter state, e.g. after a seek"""
+        self._ring.clear()
+        # The callback owns the filter state, so it is asked to drop it
+        self._reset_state = True
+
+    def stats(self):
+        """Block processing time against the block duration"""
+        budget_ms = BLOCK_SIZE * 1000 / SAMPLE_RATE
+        return {
+            "active": self._tapping,
+            "blocks": self._block_count,
+            "block_ms": budget_ms,
+            "last_ms": self._last_block_ms,
+            "average_ms": self._average_block_ms,
+            "max_ms": self._max_block_ms,
+            "load": self._average_block_ms / budget_ms,
+            "underruns": self._underruns,
+            "overruns": self._overruns,
+            "design_us": self._last_design_us,
+            "design_cache": peaking_section.cache_info()._asdict()
+        }
+
+    def _update_state(self):
+        """Start or stop tapping the player to match the current settings"""
+        wanted = (self._enabled and self._running and self._player is not None
+                  and self._tap is not None and any(abs(g) >= 0.05 for g in self._gains))
+        if wanted == self._tapping:
+            return
+
+        try:
+            if wanted:
+                self.flush()
+                self._stream = sd.OutputStream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE,
+                                               channels=CHANNELS, dtype='float32',
+                                               latency='high', callback=self._callback)
+                self._stream.start()
+                self._capture_player()
+                self._tapping = True
+            else:
+                self._tapping = False
+                self._release_player()
+                if self._stream is not None:
+                    self._stream.stop()
+                    self._stream.close()
+                    self._stream = None
+        except Exception as e:
+            print(f"Error switching built-in equalizer: {e}")
+            self._tapping = False
+            self._release_player()
+            self._stream = None
+
+    def _capture_player(self):
+        self._tap.subscribe(self._handle_samples)
+        if self._player.audioOutput():
+            self._player.audioOutput().setMuted(True)
+
+    def _release_player(self):
+        if self._tap is not None:
+            self._tap.unsubscribe(self._handle_samples)
+        if self._player is None:
+            return
+        if self._player.audioOutput():
+            self._player.audioOutput().setMuted(False)
+
+    # -------- Audio path --------
+
+    def _handle_samples(self, samples):
+        """Queue decoded audio from the tap"""
+        if not self._tapping:
+            return
+        if self._ring.write(samples):
+            self._overruns += 1
+
+    def _callback(self, outdata, frames, time_info, status):
+        """sounddevice callback: filter one block with the state left by the previous one"""
+        started = time.perf_counter()
+        block = self._block[:frames] if frames <= len(self._block) else np.zeros((frames, CHANNELS), np.float32)
+        available = self._ring.read(block)
+        if available < frames:
+            block[available:] = 0.0
+            if available:
+                self._underruns += 1
+
+        sos, preamp = self._filter
+        zi = self._zi
+        if self._reset_state:
+            self._reset_state = False
+            zi = None
+        if zi is None or zi.shape[0] != len(sos):
+            zi = np.zeros((len(sos), 2, CHANNELS))
+        filtered, self._zi = signal.sosfilt(sos, block, axis=0, zi=zi)
+        outdata[:] = filtered * (preamp * self._volume)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._block_count += 1
+        self._last_block_ms = elapsed_ms
+        self._max_block_ms = max(self._max_block_ms, elapsed_ms)
+        # Exponential moving average over roughly the last 50 blocks
+        self._average_block_ms += (elapsed_ms - self._average_block_ms) / min(self._block_count, 50)
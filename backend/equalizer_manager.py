@@ -6,9 +6,133 @@ import subprocess
 import threading
 import time
 
+from backend.audio_processor import (AudioProcessor, AUDIO_PROCESSOR_AVAILABLE, NUMPY_AVAILABLE,
+                                     BAND_Q, SAMPLE_RATE, frequency_response, peaking_section)
+from backend.lru_cache import LRUCache
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
 # Check system type
 SYSTEM = platform.system()  # 'Windows', 'Linux', or 'Darwin' for macOS
 
+
+class CoalescingWriter:
+    """Applies the latest submitted settings on a background thread
+
+    submit() only records a snapshot and returns. The worker waits until no
+    new snapshot has arrived for settle seconds, or max_delay seconds have
+    passed since the first unwritten one, and then applies the newest
+    snapshot once; everything submitted in between is dropped.
+    """
+
+    def __init__(self, apply, settle=0.15, max_delay=0.5, name="writer"):
+        self._apply = apply
+        self._settle = settle
+        self._max_delay = max_delay
+        self._condition = threading.Condition()
+        self._pending = None
+        self._first_request = 0.0
+        self._last_request = 0.0
+        self._busy = False
+        self._flushing = False
+        self._stopped = False
+
+        # Counters, read through stats()
+        self._requests = 0
+        self._writes = 0
+        self._errors = 0
+        self._last_apply_ms = 0.0
+        self._max_apply_ms = 0.0
+        self._total_apply_ms = 0.0
+        self._last_latency_ms = 0.0
+
+        thread = threading.Thread(target=self._run, name=name)
+        thread.daemon = True
+        thread.start()
+
+    def submit(self, snapshot):
+        """Schedule snapshot to be applied, replacing any not yet written"""
+        with self._condition:
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_request = now
+            self._pending = snapshot
+            self._last_request = now
+            self._requests += 1
+            self._condition.notify()
+
+    def flush(self, timeout=2.0):
+        """Apply a pending snapshot now and wait for the worker to go idle"""
+        with self._condition:
+            self._flushing = True
+            self._condition.notify()
+            self._condition.wait_for(lambda: self._pending is None and not self._busy, timeout)
+            # Cleared here too: with nothing pending the worker never consumes the flag
+            self._flushing = False
+
+    def stop(self):
+        self.flush()
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "requests": self._requests,
+                "writes": self._writes,
+                "coalesced": self._requests - self._writes - (self._pending is not None) - self._busy,
+                "errors": self._errors,
+                "pending": self._pending is not None,
+                "last_apply_ms": self._last_apply_ms,
+                "max_apply_ms": self._max_apply_ms,
+                "average_apply_ms": self._total_apply_ms / self._writes if self._writes else 0.0,
+                "last_latency_ms": self._last_latency_ms
+            }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped:
+                    if self._pending is not None:
+                        now = time.monotonic()
+                        due = min(self._last_request + self._settle,
+                                  self._first_request + self._max_delay)
+                        if now >= due or self._flushing:
+                            break
+                        self._condition.wait(due - now)
+                    else:
+                        self._condition.wait()
+                if self._stopped:
+                    return
+                snapshot = self._pending
+                first_request = self._first_request
+                self._pending = None
+                self._flushing = False
+                self._busy = True
+
+            started = time.monotonic()
+            try:
+                self._apply(snapshot)
+                failed = False
+            except Exception as e:
+                print(f"Error applying settings in background: {e}")
+                failed = True
+            finished = time.monotonic()
+
+            with self._condition:
+                self._busy = False
+                apply_ms = (finished - started) * 1000
+                self._writes += 1
+                self._errors += failed
+                self._last_apply_ms = apply_ms
+                self._max_apply_ms = max(self._max_apply_ms, apply_ms)
+                self._total_apply_ms += apply_ms
+                # From the first change in the burst until it reached the backend
+                self._last_latency_ms = (finished - first_request) * 1000
+                self._condition.notify_all()
+
 class EqualizerManager(QObject):
     """Manager class for system-wide equalizer functionality"""
     
@@ -61,6 +185,29 @@ class EqualizerManager(QObject):
         # Platform-specific settings
         self._setup_platform_specific()
         
+        # System equalizer files are written off the GUI thread, once per burst of changes
+        self._easyeffects_running = False
+        self._easyeffects_checked = 0.0
+        self._easyeffects_check_ttl = 30.0  # Seconds
+        self._system_writer = None
+        if self._system_equalizer_available:
+            self._system_writer = CoalescingWriter(self._write_system_equalizer, name="system-eq")
+        
+        # Without a system-wide equalizer the bands are applied in-process.
+        # The sliders are always live in that case, so it starts enabled.
+        self._audio_processor = None
+        if AUDIO_PROCESSOR_AVAILABLE and not self._system_equalizer_available:
+            try:
+                self._audio_processor = AudioProcessor(self._equalizer_frequencies, self)
+            except Exception as e:
+                print(f"Error creating built-in equalizer: {e}")
+        
+        # Response curves for the equalizer screen, by band values
+        self._response_points = 256
+        self._response_frequencies = (np.geomspace(20.0, 20000.0, self._response_points)
+                                      if NUMPY_AVAILABLE else None)
+        self._response_cache = LRUCache(max_entries=64)
+        
         # Apply default preset
         self.apply_preset("Flat")
     
@@ -82,6 +229,9 @@ class EqualizerManager(QObject):
             if active:
                 self._apply_system_equalizer()
             
+            if self._audio_processor:
+                self._audio_processor.set_enabled(active)
+            
             self.equalizerStatusChanged.emit(active)
             
     # Define the properties with notify signals for QML
@@ -115,6 +265,44 @@ class EqualizerManager(QObject):
     @Slot(result=bool)
     def is_equalizer_active(self): return self._equalizer_active
 
+    @Slot(result='QVariantMap')
+    def get_processor_stats(self):
+        """Per-block CPU time of the built-in equalizer; empty without one"""
+        return self._audio_processor.stats() if self._audio_processor else {}
+
+    @Slot(result=list)
+    def get_frequency_response(self):
+        """Combined gain in dB of all bands at log-spaced points from 20 Hz to 20 kHz
+
+        Empty without numpy. Curves are cached by band values, so moving a
+        slider back over positions already drawn costs a dictionary lookup.
+        """
+        if not NUMPY_AVAILABLE:
+            return []
+        key = tuple(float(value) for value in self._equalizer_values)
+        response = self._response_cache.get(key)
+        if response is None:
+            try:
+                sections = [peaking_section(frequency, gain, BAND_Q, SAMPLE_RATE)
+                            for frequency, gain in zip(self._equalizer_frequencies, key)]
+                response = frequency_response(sections, self._response_frequencies).tolist()
+                self._response_cache.put(key, response)
+            except Exception as e:
+                print(f"Error computing equalizer response: {e}")
+                return []
+        return response
+
+    @Slot(result='QVariantMap')
+    def get_system_equalizer_stats(self):
+        """Write counts and latency of the system equalizer; empty without one"""
+        return self._system_writer.stats() if self._system_writer else {}
+
+    @Slot()
+    def shutdown(self):
+        """Write any pending system equalizer change before the app exits"""
+        if self._system_writer:
+            self._system_writer.stop()
+
     @Slot(bool)
     def set_equalizer_active(self, active):
         self._set_equalizer_active(active)
@@ -139,6 +327,9 @@ class EqualizerManager(QObject):
             if self._equalizer_active:
                 self._apply_system_equalizer()
             
+            if self._audio_processor:
+                self._audio_processor.set_band(band_index, value)
+            
             # Emit signal
             self.equalizerBandsChanged.emit(self._equalizer_values)
             print(f"Set equalizer band {band_index} ({self._equalizer_frequencies[band_index]} Hz) to {value} dB")
@@ -171,14 +362,13 @@ class EqualizerManager(QObject):
             # Save to file
             self._save_user_presets()
             
-            # Save to platform-specific format if needed
-            if SYSTEM == "Linux" and self._eq_command_path:
-                safe_name = preset_name.replace(" ", "_").lower()
-                self._create_easyeffects_preset(safe_name)
-                
-                # Apply if active
+            # Save to platform-specific format if needed; applying writes the
+            # preset file too, otherwise the writer thread only saves it
+            if SYSTEM == "Linux" and self._eq_command_path and self._system_writer:
                 if self._equalizer_active:
                     self._apply_system_equalizer()
+                else:
+                    self._system_writer.submit((preset_name, list(self._equalizer_values), False))
             
             # Emit signals
             self.available_presetsChanged.emit()
@@ -273,6 +463,9 @@ class EqualizerManager(QObject):
             if self._equalizer_active:
                 self._apply_system_equalizer()
             
+            if self._audio_processor:
+                self._audio_processor.set_gains(self._equalizer_values)
+            
             # Emit signals
             self.equalizerBandsChanged.emit(self._equalizer_values)
             self.presetChanged.emit(preset_name)
@@ -345,38 +538,52 @@ class EqualizerManager(QObject):
             self._system_equalizer_available = False
     
     def _apply_system_equalizer(self):
-        """Apply equalizer settings to system-wide equalizer"""
-        if not self._equalizer_active:
+        """Queue the current settings for the system-wide equalizer"""
+        if not self._equalizer_active or not self._system_writer:
+            return
+        self._system_writer.submit((self._current_preset, list(self._equalizer_values), True))
+    
+    def _write_system_equalizer(self, snapshot):
+        """Writer thread: apply one (preset name, band values, apply) snapshot
+
+        Without apply the preset is only saved in the system equalizer's
+        format. Failures propagate so the writer reports and counts them.
+        """
+        preset, values, apply = snapshot
+        if not apply:
+            if SYSTEM == "Linux":
+                self._write_easyeffects_preset(preset, values)
             return
             
-        try:
-            if SYSTEM == "Windows":
-                self._apply_windows_equalizer()
-            elif SYSTEM == "Linux":
-                self._apply_linux_equalizer_file_only()
-            elif SYSTEM == "Darwin":  # macOS
-                if self._eq_command_path:
-                    subprocess.Popen(self._eq_command_path, shell=True)
-        except Exception as e:
-            print(f"Error applying system equalizer: {e}")
+        if SYSTEM == "Windows":
+            self._apply_windows_equalizer(preset, values)
+        elif SYSTEM == "Linux":
+            self._apply_linux_equalizer_file_only(preset, values)
+        elif SYSTEM == "Darwin":  # macOS
+            if self._eq_command_path:
+                subprocess.Popen(self._eq_command_path, shell=True)
     
-    def _apply_linux_equalizer_file_only(self):
+    def _apply_linux_equalizer_file_only(self, preset, values):
         """Apply equalizer settings to EasyEffects on Linux using file-based approach"""
         if not self._eq_command_path:
             return
             
-        try:
-            # Create EasyEffects preset file with current preset name
-            preset_name = self._current_preset.replace(" ", "_").lower()
-            self._create_easyeffects_preset(preset_name)
-            
-            # Launch the EasyEffects UI
-            self._launch_easyeffects_ui()
-        except Exception as e:
-            print(f"Error applying EasyEffects settings: {e}")
+        # Create EasyEffects preset file with current preset name
+        self._write_easyeffects_preset(preset, values)
+        
+        # Launch the EasyEffects UI
+        self._launch_easyeffects_ui()
     
-    def _create_easyeffects_preset(self, preset_name="octave_preset"):
+    def _write_easyeffects_preset(self, preset, values):
+        """Writer thread: save an EasyEffects preset file named after preset"""
+        preset_name = preset.replace(" ", "_").lower()
+        if self._create_easyeffects_preset(preset_name, values) is None:
+            raise OSError(f"could not write EasyEffects preset {preset_name}")
+    
+    def _create_easyeffects_preset(self, preset_name="octave_preset", values=None):
         """Create EasyEffects preset file with current settings"""
+        if values is None:
+            values = list(self._equalizer_values)
         try:
             preset_path = os.path.join(self._easyeffects_preset_dir, f"{preset_name}.json")
             
@@ -405,7 +612,7 @@ class EqualizerManager(QObject):
             for i, freq in enumerate(self._equalizer_frequencies):
                 band_data = {
                     "frequency": float(freq),
-                    "gain": self._equalizer_values[i], 
+                    "gain": values[i], 
                     "mode": "RLC (BT)",
                     "mute": False,
                     "q": q_value,
@@ -418,9 +625,11 @@ class EqualizerManager(QObject):
                 preset_data["output"]["equalizer"]["left"][f"band{i}"] = band_data.copy()
                 preset_data["output"]["equalizer"]["right"][f"band{i}"] = band_data.copy()
             
-            # Write the file
-            with open(preset_path, 'w') as f:
+            # Write a temporary file and rename it, so EasyEffects never reads a partial preset
+            temp_path = preset_path + ".tmp"
+            with open(temp_path, 'w') as f:
                 json.dump(preset_data, f, indent=2)
+            os.replace(temp_path, preset_path)
             
             print(f"Created EasyEffects preset: {preset_path}")
             return preset_path
@@ -428,18 +637,27 @@ class EqualizerManager(QObject):
             print(f"Error creating EasyEffects preset: {e}")
             return None
     
+    def _is_easyeffects_running(self):
+        """Whether EasyEffects runs, from a process listing at most every few seconds"""
+        now = time.monotonic()
+        if now - self._easyeffects_checked >= self._easyeffects_check_ttl:
+            ps_output = subprocess.check_output(['ps', 'aux'], text=True)
+            self._easyeffects_running = 'easyeffects' in ps_output
+            self._easyeffects_checked = now
+        return self._easyeffects_running
+    
     def _launch_easyeffects_ui(self):
         """Launch EasyEffects UI"""
         try:
             # Check if EasyEffects is already running
-            ps_output = subprocess.check_output(['ps', 'aux'], text=True)
-            
-            if 'easyeffects' not in ps_output:
+            if not self._is_easyeffects_running():
                 # Start it if not running
                 if self._is_flatpak:
                     subprocess.Popen(["flatpak", "run", "com.github.wwmm.easyeffects"])
                 else:
                     subprocess.Popen(["easyeffects"])
+                self._easyeffects_running = True
+                self._easyeffects_checked = time.monotonic()
         except Exception as e:
             print(f"Error launching EasyEffects: {e}")
     
@@ -462,31 +680,28 @@ class EqualizerManager(QObject):
         except Exception as e:
             print(f"Error saving user presets: {e}")
     
-    def _apply_windows_equalizer(self):
+    def _apply_windows_equalizer(self, preset, values):
         """Apply equalizer settings to Equalizer APO on Windows"""
         if not self._eq_command_path:
             return
             
-        try:
-            # Create configuration file
-            with open(self._eq_command_path, 'w') as f:
-                # Write header
-                f.write(f"# Equalizer configuration generated by Octave\n")
-                f.write(f"# Preset: {self._current_preset}\n")
-                f.write(f"# Date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-                
-                # Create GraphicEQ command
-                f.write("GraphicEQ: ")
-                
-                # Add frequency points
-                eq_points = [f"20 {self._equalizer_values[0]}"]
-                for i, freq in enumerate(self._equalizer_frequencies):
-                    eq_points.append(f"{freq} {self._equalizer_values[i]}")
-                eq_points.append(f"20000 {self._equalizer_values[-1]}")
-                
-                f.write("; ".join(eq_points))
-        except Exception as e:
-            print(f"Error applying Windows equalizer: {e}")
+        # Create configuration file
+        with open(self._eq_command_path, 'w') as f:
+            # Write header
+            f.write(f"# Equalizer configuration generated by Octave\n")
+            f.write(f"# Preset: {preset}\n")
+            f.write(f"# Date: {time.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+            
+            # Create GraphicEQ command
+            f.write("GraphicEQ: ")
+            
+            # Add frequency points
+            eq_points = [f"20 {values[0]}"]
+            for i, freq in enumerate(self._equalizer_frequencies):
+                eq_points.append(f"{freq} {values[i]}")
+            eq_points.append(f"20000 {values[-1]}")
+            
+            f.write("; ".join(eq_points))
             
     def _is_matching_preset(self):
         """Check if current values match any preset"""
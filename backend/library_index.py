@@ -0,0 +1,406 @@
+import os
+import sqlite3
+import threading
+
+
+class LibraryIndex:
+    """Persistent on-disk index of track metadata keyed by path, size and mtime"""
+
+    # Each entry upgrades the schema by one version; never edit existing entries
+    _MIGRATIONS = [
+        """
+        CREATE TABLE IF NOT EXISTS tracks (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            title TEXT,
+            artist TEXT,
+            album TEXT,
+            duration INTEGER
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS directories (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            files TEXT NOT NULL,
+            subdirs TEXT NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS track_art (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            art_hash TEXT NOT NULL
+        )
+        """,
+        # Set when the embedded pictures of a track were recorded in track_pictures
+        "ALTER TABLE tracks ADD COLUMN pictures_indexed INTEGER NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE IF NOT EXISTS track_pictures (
+            path TEXT NOT NULL,
+            picture INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            length INTEGER NOT NULL,
+            mime TEXT NOT NULL,
+            PRIMARY KEY (path, picture)
+        )
+        """,
+        # Loudness is NULL for silent or undecodable files, which are not analysed again
+        """
+        CREATE TABLE IF NOT EXISTS track_loudness (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            loudness REAL,
+            peak REAL NOT NULL,
+            gain REAL NOT NULL
+        )
+        """,
+        # Interleaved int8 (min, max) peak pairs for drawing the seek bar
+        """
+        CREATE TABLE IF NOT EXISTS track_waveforms (
+            path TEXT PRIMARY KEY,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            peaks BLOB NOT NULL
+        )
+        """,
+    ]
+
+    def __init__(self, db_path):
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._open()
+
+    def _open(self):
+        """Open the database and bring the schema up to date"""
+        try:
+            os.makedirs(os.path.dirname(self._db_path), exist_ok=True)
+            # The connection is shared between the GUI thread and scanner workers,
+            # access is serialized through self._lock
+            self._conn = sqlite3.connect(self._db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            for index, statement in enumerate(self._MIGRATIONS[version:], start=version):
+                self._conn.execute(statement)
+                self._conn.execute(f"PRAGMA user_version = {index + 1}")
+            self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error opening library index {self._db_path}: {e}")
+            self._conn = None
+
+    @property
+    def available(self):
+        return self._conn is not None
+
+    def lookup(self, path, stat):
+        """Return cached metadata for path if the file is unchanged, otherwise None"""
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, title, artist, album, duration FROM tracks WHERE path = ?",
+                    (path,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Library index lookup error for {path}: {e}")
+            return None
+
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+
+        return {
+            "title": row[2],
+            "artist": row[3],
+            "album": row[4],
+            "duration": row[5]
+        }
+
+    def store(self, path, stat, metadata, pictures=None, commit=True):
+        """Insert or replace the metadata row for path
+        
+        pictures is a list of (offset, length, mime) for the embedded images, or
+        None if they were not located.
+        """
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tracks "
+                    "(path, size, mtime_ns, title, artist, album, duration, pictures_indexed) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns,
+                     metadata["title"], metadata["artist"], metadata["album"], metadata["duration"],
+                     0 if pictures is None else 1)
+                )
+                self._conn.execute("DELETE FROM track_pictures WHERE path = ?", (path,))
+                if pictures:
+                    self._conn.executemany(
+                        "INSERT INTO track_pictures (path, picture, offset, length, mime) VALUES (?, ?, ?, ?, ?)",
+                        [(path, index, offset, length, mime) for index, (offset, length, mime) in enumerate(pictures)]
+                    )
+                if commit:
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index store error for {path}: {e}")
+
+    _PATH_TABLES = ("tracks", "track_art", "track_pictures", "track_loudness", "track_waveforms")
+
+    def prune(self, root, keep, recursive=True):
+        """Drop the rows of files under root that are not in keep, in one transaction
+
+        keep holds paths relative to root with '/' separators, as the media
+        listing uses them. Without recursive, files in subfolders are left alone.
+        Returns the number of files pruned.
+        """
+        if not self._conn:
+            return 0
+
+        prefix = os.path.join(root, '')
+        try:
+            with self._lock:
+                orphans = []
+                for (path,) in self._conn.execute("SELECT path FROM tracks"):
+                    if not path.startswith(prefix):
+                        continue
+                    rel_path = path[len(prefix):].replace(os.sep, '/')
+                    if (recursive or '/' not in rel_path) and rel_path not in keep:
+                        orphans.append((path,))
+                if orphans:
+                    for table in self._PATH_TABLES:
+                        self._conn.executemany(f"DELETE FROM {table} WHERE path = ?", orphans)
+                    self._conn.commit()
+                return len(orphans)
+        except sqlite3.Error as e:
+            print(f"Library index prune error for {root}: {e}")
+            return 0
+
+    def lookup_pictures(self, path, stat):
+        """Return [(offset, length, mime), ...] of the images embedded in an unchanged file
+        
+        None means the file changed or its pictures were never located.
+        """
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, pictures_indexed FROM tracks WHERE path = ?",
+                    (path,)
+                ).fetchone()
+                if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns or not row[2]:
+                    return None
+                return self._conn.execute(
+                    "SELECT offset, length, mime FROM track_pictures WHERE path = ? ORDER BY picture",
+                    (path,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Library index picture lookup error for {path}: {e}")
+            return None
+
+    def lookup_loudness(self, path, stat):
+        """Return {loudness, peak, gain} measured for an unchanged file, otherwise None"""
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, loudness, peak, gain FROM track_loudness WHERE path = ?",
+                    (path,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Library index loudness lookup error for {path}: {e}")
+            return None
+
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+
+        return {
+            "loudness": row[2],
+            "peak": row[3],
+            "gain": row[4]
+        }
+
+    def store_loudness(self, path, stat, result):
+        """Record the loudness analysis of a file"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO track_loudness (path, size, mtime_ns, loudness, peak, gain) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, result["loudness"], result["peak"], result["gain"])
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index loudness store error for {path}: {e}")
+
+    def lookup_waveform(self, path, stat):
+        """Return the waveform peak bytes stored for an unchanged file, otherwise None"""
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, peaks FROM track_waveforms WHERE path = ?",
+                    (path,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Library index waveform lookup error for {path}: {e}")
+            return None
+
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return row[2]
+
+    def store_waveform(self, path, stat, peaks):
+        """Record the waveform peaks of a file"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO track_waveforms (path, size, mtime_ns, peaks) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, peaks)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index waveform store error for {path}: {e}")
+
+    def lookup_art(self, path, stat):
+        """Return the album art hash recorded for an unchanged file
+
+        "" means the file has no embedded art; None means it has not been checked.
+        """
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, art_hash FROM track_art WHERE path = ?",
+                    (path,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Library index art lookup error for {path}: {e}")
+            return None
+
+        if row is None or row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+            return None
+        return row[2]
+
+    def store_art(self, path, stat, art_hash):
+        """Record which stored album art image belongs to a file"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO track_art (path, size, mtime_ns, art_hash) VALUES (?, ?, ?, ?)",
+                    (path, stat.st_size, stat.st_mtime_ns, art_hash)
+                )
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index art store error for {path}: {e}")
+
+    def file_stats(self, prefix):
+        """Return {path: (size, mtime_ns)} of indexed files directly under prefix
+
+        prefix is a folder path ending in a separator. Files in its subfolders,
+        whose remaining path holds a '/', are left out.
+        """
+        if not self._conn:
+            return {}
+
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns FROM tracks WHERE path >= ? AND path < ? "
+                    "AND instr(substr(path, ?), '/') = 0",
+                    (prefix, prefix + '\U0010ffff', len(prefix) + 1)
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"Library index stat lookup error for {prefix}: {e}")
+            return {}
+
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def lookup_directory(self, path, mtime_ns):
+        """Return (files, subdirs) recorded for an unchanged directory, otherwise None"""
+        if not self._conn:
+            return None
+
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT mtime_ns, files, subdirs FROM directories WHERE path = ?",
+                    (path,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Library index directory lookup error for {path}: {e}")
+            return None
+
+        if row is None or row[0] != mtime_ns:
+            return None
+
+        # Listings are newline-joined, which is fine for any sane music filename
+        files = row[1].split("\n") if row[1] else []
+        subdirs = row[2].split("\n") if row[2] else []
+        return files, subdirs
+
+    def store_directory(self, path, mtime_ns, files, subdirs, commit=True):
+        """Record the MP3 files and subdirectories of a directory listing"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO directories (path, mtime_ns, files, subdirs) VALUES (?, ?, ?, ?)",
+                    (path, mtime_ns, "\n".join(files), "\n".join(subdirs))
+                )
+                if commit:
+                    self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index directory store error for {path}: {e}")
+
+    def commit(self):
+        """Flush rows written with commit=False"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.commit()
+        except sqlite3.Error as e:
+            print(f"Library index commit error: {e}")
+
+    def close(self):
+        """Commit and close the database connection"""
+        if not self._conn:
+            return
+
+        try:
+            with self._lock:
+                self._conn.commit()
+                self._conn.close()
+        except sqlite3.Error as e:
+            print(f"Error closing library index: {e}")
+        finally:
+            self._conn = None
@@ -0,0 +1,84 @@
+from collections import Counter
+
+
+class LibraryStats:
+    """Running totals for the media library
+
+    Each track's contribution (duration, album, artist) is remembered, so a
+    track can be added, retagged or removed without touching the others.
+    Albums and artists are reference counted, which keeps every getter O(1).
+    """
+
+    UNKNOWN_ALBUM = "Unknown Album"
+    UNKNOWN_ARTIST = "Unknown Artist"
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._tracks = {}  # Filename to (duration_ms, album, artist) contribution
+        self._albums = Counter()
+        self._artists = Counter()
+        self._total_duration_ms = 0
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, filename):
+        return filename in self._tracks
+
+    def update(self, filename, metadata):
+        """Add a track, or replace its contribution if it was retagged
+
+        Returns True if the totals changed.
+        """
+        album = metadata["album"] if metadata["album"] != self.UNKNOWN_ALBUM else None
+        artist = metadata["artist"] if metadata["artist"] != self.UNKNOWN_ARTIST else None
+        entry = (metadata["duration"] * 1000, album, artist)
+
+        if self._tracks.get(filename) == entry:
+            return False
+
+        self.remove(filename)
+        duration_ms, album, artist = entry
+        self._total_duration_ms += duration_ms
+        if album:
+            self._albums[album] += 1
+        if artist:
+            self._artists[artist] += 1
+        self._tracks[filename] = entry
+        return True
+
+    def update_many(self, tracks):
+        """Apply update() to (filename, metadata) pairs; True if any totals changed"""
+        changed = False
+        for filename, metadata in tracks:
+            changed = self.update(filename, metadata) or changed
+        return changed
+
+    def remove(self, filename):
+        """Drop a track's contribution; True if it was counted"""
+        entry = self._tracks.pop(filename, None)
+        if entry is None:
+            return False
+
+        duration_ms, album, artist = entry
+        self._total_duration_ms -= duration_ms
+        for counts, value in ((self._albums, album), (self._artists, artist)):
+            if value:
+                counts[value] -= 1
+                if counts[value] <= 0:
+                    del counts[value]
+        return True
+
+    @property
+    def total_duration_ms(self):
+        return self._total_duration_ms
+
+    @property
+    def album_count(self):
+        return len(self._albums)
+
+    @property
+    def artist_count(self):
+        return len(self._artists)
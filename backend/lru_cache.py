@@ -0,0 +1,109 @@
+from collections import OrderedDict
+import threading
+
+
+class LRUCache:
+    """Least recently used cache bounded by entry count and/or total bytes
+
+    Lookups, inserts and evictions are O(1). Entry sizes come from the optional
+    sizeof callable; without it only the entry limit applies. All operations
+    take an internal lock so the cache can be shared with worker threads.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, sizeof=None):
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # Key to (value, size), least recently used first
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the value for key and mark it most recently used"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def peek(self, key, default=None):
+        """Return the value for key without touching recency or counters"""
+        with self._lock:
+            entry = self._data.get(key)
+            return default if entry is None else entry[0]
+
+    def put(self, key, value):
+        """Insert or replace key, evicting least recently used entries over the limits"""
+        size = self._sizeof(value) if self._sizeof else 0
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+            self._data[key] = (value, size)
+            self._total_bytes += size
+            self._evict()
+
+    def pop(self, key, default=None):
+        """Remove key and return its value"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return default
+            self._total_bytes -= entry[1]
+            return entry[0]
+
+    def clear(self):
+        """Drop every entry; counters are kept"""
+        with self._lock:
+            self._data.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def _evict(self):
+        """Pop from the cold end until within limits; caller holds the lock"""
+        # The newest entry is kept even if it alone exceeds max_bytes
+        while len(self._data) > 1 and (
+                (self._max_entries is not None and len(self._data) > self._max_entries) or
+                (self._max_bytes is not None and self._total_bytes > self._max_bytes)):
+            _, (_, size) = self._data.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def __getitem__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                raise KeyError(key)
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __setitem__(self, key, value):
+        self.put(key, value)
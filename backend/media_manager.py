@@ -1,21 +1,338 @@
-from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer
+from PySide6.QtCore import QObject, Signal, Slot, Property, QTimer, QFileSystemWatcher
 from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PySide6.QtCore import QUrl
 from mutagen.mp3 import MP3
 from mutagen.id3 import ID3, TIT2, TPE1, TALB
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
 import os
-import random
-import re
+import mmap
+import multiprocessing
+import struct
+import threading
+import time
 
-# Check if audio processing libraries are available
-try:
-    import numpy as np
-    import sounddevice as sd
-    import scipy.signal as signal
-    AUDIO_PROCESSING_AVAILABLE = True
-except ImportError:
-    AUDIO_PROCESSING_AVAILABLE = False
-    print("Warning: numpy, scipy, or sounddevice not available. Equalizer will be visual-only.")
+from backend.library_index import LibraryIndex
+from backend.album_art_store import AlbumArtStore
+from backend.album_art_provider import AlbumArtProvider, encode_track_id
+from backend.sort_index import SortIndex
+from backend.lru_cache import LRUCache
+from backend.track_list_model import TrackListModel
+from backend.library_stats import LibraryStats
+from backend.track_table import TrackTable
+from backend.search_index import SearchIndex
+from backend.mp3_probe import probe_mp3, ProbeError
+from backend.play_queue import PlayQueue
+from backend.audio_analysis import analyze_loudness, compute_waveform, analysis_available, lower_priority, DecodeError
+
+from backend.audio_processor import AUDIO_PROCESSOR_AVAILABLE as AUDIO_PROCESSING_AVAILABLE, AUDIO_TAP_AVAILABLE, AudioTap
+from backend.spectrum_analyzer import SpectrumAnalyzer, log_band_centers
+
+
+def iter_media_tree(root, rel_root="", recursive=True, library_index=None, cancel_event=None):
+    """Stream (relative_dir, mp3_paths) for each directory under root/rel_root
+    
+    Directories are walked depth-first with os.scandir and nothing is collected
+    between yields. Listings of directories whose mtime is unchanged are served
+    from the library index instead of being read again. Paths are relative to
+    root and always use '/' as separator.
+    """
+    stack = [rel_root]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+            
+        rel_dir = stack.pop()
+        abs_dir = os.path.join(root, rel_dir) if rel_dir else root
+        try:
+            mtime_ns = os.stat(abs_dir).st_mtime_ns
+        except OSError:
+            continue
+        
+        listing = library_index.lookup_directory(abs_dir, mtime_ns) if library_index else None
+        if listing is not None:
+            files, subdirs = listing
+        else:
+            files, subdirs = [], []
+            try:
+                with os.scandir(abs_dir) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if not entry.name.startswith('.'):
+                                    subdirs.append(entry.name)
+                            elif entry.name.lower().endswith('.mp3'):
+                                files.append(entry.name)
+                        except OSError:
+                            continue
+            except OSError as e:
+                print(f"Error listing {abs_dir}: {e}")
+                continue
+                
+            if library_index:
+                library_index.store_directory(abs_dir, mtime_ns, files, subdirs, commit=False)
+        
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        yield rel_dir, [prefix + name for name in files]
+        
+        if recursive:
+            stack.extend(prefix + name for name in reversed(subdirs))
+
+
+class MediaTreeWalker(QObject):
+    """Lists a media folder tree on a background thread and streams the files found"""
+    
+    filesFound = Signal(int, list, list)   # generation, relative directories, relative files
+    walkFinished = Signal(int)             # generation
+    
+    def __init__(self, library_index, chunk_size=500):
+        super().__init__()
+        self._library_index = library_index
+        self._chunk_size = chunk_size
+        self._generation = 0
+        self._cancel_event = None
+        
+    def walk(self, root, recursive=True):
+        """Start walking root, cancelling any walk still in progress"""
+        self.cancel()
+        self._generation += 1
+        self._cancel_event = threading.Event()
+        
+        thread = threading.Thread(target=self._run,
+                                  args=(self._generation, root, recursive, self._cancel_event))
+        thread.daemon = True
+        thread.start()
+        return self._generation
+    
+    def cancel(self):
+        """Stop the running walk at the next directory"""
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+            
+    def _run(self, generation, root, recursive, cancel_event):
+        """Walk thread: emit files in fixed-size chunks so memory stays bounded"""
+        directories = []
+        files = []
+        try:
+            for rel_dir, names in iter_media_tree(root, recursive=recursive,
+                                                  library_index=self._library_index,
+                                                  cancel_event=cancel_event):
+                directories.append(rel_dir)
+                files.extend(names)
+                if len(files) >= self._chunk_size:
+                    self.filesFound.emit(generation, directories, files)
+                    directories = []
+                    files = []
+                    
+            if cancel_event.is_set():
+                return
+                
+            self._library_index.commit()
+            if directories:
+                self.filesFound.emit(generation, directories, files)
+            self.walkFinished.emit(generation)
+        except Exception as e:
+            print(f"Error walking media folder {root}: {e}")
+
+
+class LibraryScanner(QObject):
+    """Reads track metadata on a worker pool and streams results back in batches"""
+    
+    # Signals are emitted from the scan thread and delivered queued to the GUI thread
+    batchReady = Signal(int, list)            # generation, [(filename, metadata), ...]
+    progressChanged = Signal(int, int, int)   # generation, files scanned, total files
+    scanFinished = Signal(int)                # generation
+    
+    def __init__(self, load_metadata, library_index, max_workers=None, batch_size=64):
+        super().__init__()
+        self._load_metadata = load_metadata
+        self._library_index = library_index
+        self._max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                            thread_name_prefix="library-scan")
+        self._generation = 0
+        self._lock = threading.Lock()
+        
+    def scan(self, media_dir, filenames):
+        """Start scanning filenames in media_dir, superseding any running scan"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            
+        thread = threading.Thread(target=self._run, args=(generation, media_dir, list(filenames)))
+        thread.daemon = True
+        thread.start()
+        return generation
+    
+    def cancel(self):
+        """Abandon the running scan; workers stop at the next file"""
+        with self._lock:
+            self._generation += 1
+    
+    def shutdown(self):
+        """Cancel scanning and release the worker pool"""
+        self.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        
+    def _is_current(self, generation):
+        return generation == self._generation
+    
+    def _scan_file(self, generation, media_dir, filename):
+        """Worker task: load metadata for one file unless the scan was superseded"""
+        if not self._is_current(generation):
+            return None
+        try:
+            return filename, self._load_metadata(media_dir, filename, commit=False)
+        except Exception as e:
+            # One unreadable file must not end the scan
+            print(f"Error scanning {filename}: {e}")
+            return None
+        
+    def _run(self, generation, media_dir, filenames):
+        """Scan thread: keep the pool busy with a bounded window and emit batches"""
+        total = len(filenames)
+        scanned = 0
+        batch = []
+        pending = set()
+        remaining = iter(filenames)
+        window = self._max_workers * 4
+        
+        try:
+            self.progressChanged.emit(generation, 0, total)
+            
+            while True:
+                # Top up the in-flight window
+                while len(pending) < window and self._is_current(generation):
+                    filename = next(remaining, None)
+                    if filename is None:
+                        break
+                    pending.add(self._executor.submit(self._scan_file, generation, media_dir, filename))
+                    
+                if not pending or not self._is_current(generation):
+                    break
+                    
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        batch.append(result)
+                    scanned += 1
+                    
+                if len(batch) >= self._batch_size:
+                    self._flush(generation, batch, scanned, total)
+                    batch = []
+                    
+            if not self._is_current(generation):
+                return
+                
+            self._flush(generation, batch, scanned, total)
+            self.scanFinished.emit(generation)
+        except Exception as e:
+            print(f"Library scan error: {e}")
+        
+    def _flush(self, generation, batch, scanned, total):
+        """Commit indexed rows and hand a batch of results to the GUI thread"""
+        self._library_index.commit()
+        if batch:
+            self.batchReady.emit(generation, batch)
+        self.progressChanged.emit(generation, scanned, total)
+
+
+class LoudnessAnalyzer(QObject):
+    """Measures track loudness in worker processes and records gains in the library index
+    
+    Files analysed before and unchanged since are skipped, so an interrupted
+    analysis resumes where it stopped. While throttled (during playback) only
+    one file is analysed at a time.
+    """
+    
+    progressChanged = Signal(int, int)   # files done, total files
+    
+    def __init__(self, library_index, submit, max_workers):
+        super().__init__()
+        self._library_index = library_index
+        self._submit = submit
+        self._max_workers = max_workers
+        self._throttled = False
+        self._generation = 0
+        self._lock = threading.Lock()
+        
+    def analyze(self, paths):
+        """Analyse paths in order, superseding any running analysis"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            
+        thread = threading.Thread(target=self._run, args=(generation, list(paths)))
+        thread.daemon = True
+        thread.start()
+        
+    def cancel(self):
+        """Stop submitting files; those in flight finish and are recorded"""
+        with self._lock:
+            self._generation += 1
+    
+    @Slot(bool)
+    def set_throttled(self, throttled):
+        self._throttled = bool(throttled)
+        
+    def _is_current(self, generation):
+        return generation == self._generation
+    
+    def _run(self, generation, paths):
+        """Feeder thread: keep up to the allowed number of files in the process pool"""
+        total = len(paths)
+        done_count = 0
+        pending = {}
+        remaining = iter(paths)
+        
+        try:
+            while True:
+                window = 1 if self._throttled else self._max_workers
+                while len(pending) < window and self._is_current(generation):
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        done_count += 1
+                        continue
+                    if self._library_index.lookup_loudness(path, stat) is not None:
+                        done_count += 1
+                        continue
+                    future = self._submit(analyze_loudness, path)
+                    if future is None:
+                        # The pool could not start; finish what is in flight and stop
+                        remaining = iter(())
+                        break
+                    pending[future] = (path, stat)
+                    
+                if not pending:
+                    break
+                    
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, stat = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except DecodeError as e:
+                        # Recorded as unmeasurable so it is not retried until the file changes
+                        print(f"Loudness analysis could not decode {path}: {e}")
+                        result = {"loudness": None, "peak": 0.0, "gain": 0.0}
+                    except Exception as e:
+                        print(f"Loudness analysis error for {path}: {e}")
+                        continue
+                    self._library_index.store_loudness(path, stat, result)
+                    done_count += 1
+                    
+                if self._is_current(generation):
+                    self.progressChanged.emit(done_count, total)
+                    
+            if self._is_current(generation):
+                self.progressChanged.emit(total, total)
+        except Exception as e:
+            print(f"Loudness analysis error: {e}")
 
 
 class MediaManager(QObject):
@@ -23,6 +340,8 @@ class MediaManager(QObject):
     playStateChanged = Signal(bool)
     currentMediaChanged = Signal(str)
     mediaListChanged = Signal(list)
+    mediaFilesAdded = Signal(list)      # Files that appeared in the media folder
+    mediaFilesRemoved = Signal(list)    # Files that disappeared from the media folder
     muteChanged = Signal(bool)
     durationChanged = Signal(int)
     positionChanged = Signal(int)
@@ -33,60 +352,144 @@ class MediaManager(QObject):
     totalDurationChanged = Signal(str)  # Formatted duration string
     albumCountChanged = Signal(int)     # Number of unique albums
     artistCountChanged = Signal(int)    # Number of unique artists
+    libraryScanProgress = Signal(int, int)  # Files scanned, total files
+    libraryScanFinished = Signal()
+    trackGapMeasured = Signal(float)    # Silence between consecutive tracks in ms
+    seekLatencyMeasured = Signal(float) # Time from set_position until playback resumed, in ms
+    loudnessAnalysisProgress = Signal(int, int)  # Files analysed, total files
+    waveformReady = Signal(str)         # Filename whose waveform get_waveform can now return
+    spectrumChanged = Signal(list)      # Band levels from 0 to 1 while the spectrum is active
     
     
     def __init__(self):
         super().__init__()
-        self._player = QMediaPlayer()
-        self._audio_output = QAudioOutput()
-        self._player.setAudioOutput(self._audio_output)
+        # Two players: the active one and a standby that preloads the next track
+        self._player, self._audio_output = self._create_player()
+        self._next_player, self._next_audio_output = self._create_player()
+        
+        # Each output plays at the user volume scaled by its track's loudness gain
+        self._volume = 0.5
+        self._output_gains = {}  # QAudioOutput to linear gain of the track it plays
+        self._replay_gain_enabled = True
         
         # Set default volume
-        self._audio_output.setVolume(0.5)
+        self._set_output_volume(0.5)
         
         # Set up media directory
         self.backend_dir = os.path.dirname(os.path.abspath(__file__))
         self.default_media_dir = os.path.join(self.backend_dir, 'media')
         self.media_dir = self.default_media_dir
-        self.temp_dir = os.path.join(self.backend_dir, 'temp')
         
-        # Media player configuration
-        self._player.setProperty("probe-size", 10000000)  # 10MB
-        self._player.setProperty("analyzeduration", 5000000)  # 5 seconds
+        # Gapless playback: the upcoming track is loaded on the standby player
+        # shortly before the current one ends and started on EndOfMedia
+        self._gapless_enabled = True
+        self._preload_lead_ms = 15000  # Start preloading this long before the end
+        self._preloaded_file = None
+        self._failed_preload = None    # Upcoming track the standby player could not load
+        self._gap_started = None       # perf_counter() at the last EndOfMedia
+        self._last_track_gap_ms = -1.0
+        
+        # Seek latency: time from set_position until the player reports the new position
+        self._seek_started = None      # perf_counter() at the last set_position
+        self._seek_target = 0
+        self._last_seek_latency_ms = -1.0
         
         # Playback state
-        self._current_index = 0
         self._is_muted = False
         self._previous_volume = 0.5
         self._is_playing = False
         self._is_paused = True
-        self._shuffle = False
         self._auto_play = False  # Set to False to prevent auto-play
         
         # Playlist management
-        self._original_files = []
-        self._current_playlist = []
+        self._queue = PlayQueue()  # Playback order, shuffle and history
+        self._sort_index = SortIndex()  # Pre-sorted orders for playlists and column sorts
+        self._search_index = SearchIndex()  # Word and trigram index over title, artist and album
+        
+        # In-memory view of the media folder, kept current by a filesystem watch.
+        # In recursive mode entries are '/'-separated paths relative to media_dir.
+        self._media_files = set()
+        self._media_files_list = []
+        self._media_files_dir = None
+        self._recursive_scan = False
+        self._walk_generation = 0
+        self._walk_in_progress = False
+        self._max_watched_dirs = 2048
+        self._watcher = QFileSystemWatcher()
+        self._watcher.directoryChanged.connect(self._handle_directory_changed)
+        
+        # Copying an album fires many change events; reconcile once they settle
+        self._changed_dirs = set()
+        self._rescan_timer = QTimer()
+        self._rescan_timer.setSingleShot(True)
+        self._rescan_timer.setInterval(300)
+        self._rescan_timer.timeout.connect(self._reconcile_media_files)
         
         # Caching
-        self._album_art_cache = {}  # Album ID to filename mapping
-        self._metadata_cache = {}  # Filename to metadata mapping
-        self._max_cache_files = 500  # Maximum number of cached files
-        self._metadata_cache_max = 1000  # Maximum metadata cache entries
-        self._access_count = {}  # Track album art access for LRU caching
-        
-        # Statistics cache
-        self._stats_cache = {
-            "total_duration_ms": 0,
-            "total_duration_formatted": "0:00:00",
-            "album_count": 0,
-            "artist_count": 0,
-            "is_valid": False
-        }
+        self._track_table = TrackTable()  # Title, artist, album and duration of every scanned file
+        
+        # State of recently used media folders, keyed by (folder, recursive), so
+        # switching back restores it instead of listing and scanning again.
+        # Sized like the settings' directory history and bounded by an estimate
+        # of the indexes' memory, which is about 2 KB per track.
+        self._retained_bytes_per_track = 2048
+        self._max_retained_bytes = 64 * 1024 * 1024
+        self._directory_states = LRUCache(max_entries=10, max_bytes=self._max_retained_bytes,
+                                          sizeof=lambda state: state["bytes"])
+        
+        # Persistent metadata index so tags are only parsed when a file changes
+        self._library_index = LibraryIndex(os.path.join(self.backend_dir, 'library_index.db'))
+        
+        # Persistent album art shared by every track with the same cover image
+        self._art_store = AlbumArtStore(os.path.join(self.backend_dir, 'art_cache'))
+        self._touched_art = set()  # Covers whose last-use time was refreshed this session
+        
+        # Registered with the QML engine as image://albumart/<track>
+        missing_art = os.path.join(os.path.dirname(self.backend_dir), 'frontend', 'assets', 'missing_art.png')
+        self.album_art_provider = AlbumArtProvider(self._art_hash_for_track, self._art_store, missing_art)
+        
+        # List model behind the media list; rows resolve their tags only when shown
+        self._track_model = TrackListModel(self._track_row_data, self)
+        self._track_model_sort = ("title", True)
+        
+        # Library statistics, updated per track as files are scanned, added,
+        # removed or retagged; valid once every listed file has been scanned
+        self._library_stats = LibraryStats()
+        self._stats_valid = False
+        self._scan_generation = 0
+        self._scan_in_progress = False
+        
+        # Background listing of nested media folders
+        self._walker = MediaTreeWalker(self._library_index)
+        self._walker.filesFound.connect(self._handle_files_found)
+        self._walker.walkFinished.connect(self._handle_walk_finished)
+        
+        # Background scanner feeding the track table and statistics
+        self._scanner = LibraryScanner(self._load_metadata, self._library_index)
+        self._scanner.batchReady.connect(self._handle_scan_batch)
+        self._scanner.progressChanged.connect(self._handle_scan_progress)
+        self._scanner.scanFinished.connect(self._handle_scan_finished)
+        
+        # Loudness analysis decodes whole tracks, so it runs in worker processes
+        # (one core is left for playback and the UI) and slows down while playing
+        self._analysis_workers = max(1, (os.cpu_count() or 1) - 1)
+        self._analysis_executor = None
+        self._analysis_failed = False
+        self._analysis_lock = threading.Lock()
+        self._loudness_analyzer = LoudnessAnalyzer(self._library_index, self._submit_analysis,
+                                                   self._analysis_workers)
+        self._loudness_analyzer.progressChanged.connect(self.loudnessAnalysisProgress)
+        self.playStateChanged.connect(self._loudness_analyzer.set_throttled)
         
-        # Connect signals
-        self._player.durationChanged.connect(self.durationChanged.emit)
-        self._player.positionChanged.connect(self.positionChanged.emit)
-        self._player.mediaStatusChanged.connect(self._handle_media_status)
+        # Seek bar waveforms, computed on the same pool when a track is first shown
+        self._waveforms = LRUCache(max_entries=32)  # File path to peak bytes, b"" if undecodable
+        self._waveform_pending = set()
+        
+        # Connect signals; only the active player is forwarded to QML
+        for player in (self._player, self._next_player):
+            player.durationChanged.connect(lambda duration, p=player: self._handle_player_duration(p, duration))
+            player.positionChanged.connect(lambda position, p=player: self._handle_player_position(p, position))
+            player.mediaStatusChanged.connect(lambda status, p=player: self._handle_media_status(p, status))
         
         # Initialize position timer
         self._position_timer = QTimer()
@@ -97,26 +500,45 @@ class MediaManager(QObject):
         # Set up equalizer support
         self._setup_equalizer_support()
         
-        # Create media and temp directories if they don't exist
+        # Create the media directory if it doesn't exist
         self._ensure_directories()
         
-        # Clear temp files on startup
-        self._clear_temp_files()
-        
         self._settings_manager = None
 
     def __del__(self):
         """Clean up resources on destruction"""
         try:
-            self._clear_temp_files()
             if self._player:
                 self._player.stop()
+            if self._next_player:
+                self._next_player.stop()
             if self._position_timer:
                 self._position_timer.stop()
             
             # Clean up audio processor if active
             if hasattr(self, '_audio_processor') and self._audio_processor:
                 self._audio_processor.stop()
+            
+            if self._walker:
+                self._walker.cancel()
+            
+            if self._scanner:
+                self._scanner.shutdown()
+            
+            if self._loudness_analyzer:
+                self._loudness_analyzer.cancel()
+            
+            if self._spectrum_analyzer:
+                self._spectrum_analyzer.shutdown()
+            
+            if self._analysis_executor:
+                self._analysis_executor.shutdown(wait=False, cancel_futures=True)
+            
+            if self._art_store:
+                self._art_store.shutdown()
+            
+            if self._library_index:
+                self._library_index.close()
         except:
             pass  # Avoid errors during shutdown
     
@@ -131,6 +553,15 @@ class MediaManager(QObject):
             
             # Audio processor for real-time processing
             self._audio_processor = None
+            
+            # Decoded audio shared by the built-in equalizer and the spectrum analyzer
+            self._audio_tap = None
+            self._spectrum_analyzer = None
+            if AUDIO_TAP_AVAILABLE:
+                self._audio_tap = AudioTap(self)
+                self._audio_tap.set_source(self._player)
+                self._spectrum_analyzer = SpectrumAnalyzer(self._audio_tap)
+                self._spectrum_analyzer.spectrumChanged.connect(self.spectrumChanged)
         except Exception as e:
             print(f"Error setting up equalizer support: {e}")
     
@@ -141,8 +572,11 @@ class MediaManager(QObject):
             self._equalizer_active = True
             
             # If audio processing is available, initialize the audio processor
-            if AUDIO_PROCESSING_AVAILABLE and hasattr(equalizer_manager, '_audio_processor'):
+            if AUDIO_PROCESSING_AVAILABLE and getattr(equalizer_manager, '_audio_processor', None):
                 self._audio_processor = equalizer_manager._audio_processor
+                self._audio_processor.set_tap(self._audio_tap)
+                self._audio_processor.set_source(self._player)
+                self._audio_processor.set_volume(self._audio_output.volume())
                 
                 # Connect to playback state changes to control audio processor
                 self.playStateChanged.connect(self._handle_playback_state_for_equalizer)
@@ -171,60 +605,413 @@ class MediaManager(QObject):
             if not os.path.exists(self.media_dir):
                 os.makedirs(self.media_dir)
                 print(f"Created media directory at: {self.media_dir}")
-            
-            if not os.path.exists(self.temp_dir):
-                os.makedirs(self.temp_dir)
-                print(f"Created temp directory at: {self.temp_dir}")
         except Exception as e:
             print(f"Error creating directories: {e}")
             
+    def _create_player(self):
+        """Create a media player with its own audio output"""
+        player = QMediaPlayer()
+        audio_output = QAudioOutput()
+        player.setAudioOutput(audio_output)
+        
+        # Media player configuration
+        player.setProperty("probe-size", 10000000)  # 10MB
+        player.setProperty("analyzeduration", 5000000)  # 5 seconds
+        return player, audio_output
+    
+    def _set_output_volume(self, volume):
+        """Apply the user volume to both outputs, each scaled by its track's gain"""
+        self._volume = volume
+        for output in (self._audio_output, self._next_audio_output):
+            output.setVolume(min(1.0, volume * self._output_gains.get(output, 1.0)))
+            
+        # The built-in equalizer mutes the player and plays the audio itself
+        if hasattr(self, '_audio_processor') and self._audio_processor:
+            self._audio_processor.set_volume(self._audio_output.volume())
+    
+    def _set_track_gain(self, output, filename):
+        """Scale an output by the measured gain of the track it is about to play"""
+        gain_db = 0.0
+        if self._replay_gain_enabled and filename:
+            file_path = os.path.join(self.media_dir, filename)
+            try:
+                loudness = self._library_index.lookup_loudness(file_path, os.stat(file_path))
+            except OSError:
+                loudness = None
+            if loudness is not None:
+                gain_db = loudness["gain"]
+                
+        self._output_gains[output] = 10 ** (gain_db / 20)
+        self._set_output_volume(self._volume)
+    
+    def _submit_analysis(self, function, *args):
+        """Run function in the analysis worker processes; None once they cannot be used
+        
+        The pool starts on first use. Workers are never forked from this
+        multithreaded Qt process: they come from a fork server where there is
+        one, and are spawned otherwise (Windows).
+        """
+        with self._analysis_lock:
+            if self._analysis_failed:
+                return None
+            try:
+                if self._analysis_executor is None:
+                    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                    self._analysis_executor = ProcessPoolExecutor(
+                        max_workers=self._analysis_workers,
+                        mp_context=multiprocessing.get_context(method),
+                        initializer=lower_priority)
+                return self._analysis_executor.submit(function, *args)
+            except Exception as e:
+                print(f"Audio analysis disabled, worker processes could not start: {e}")
+                self._analysis_failed = True
+                return None
+    
+    def _start_loudness_analysis(self):
+        """Analyse the library, starting from the current track so upcoming gains are ready first"""
+        if not self._replay_gain_enabled or not analysis_available():
+            return
+            
+        files = self._sort_index.sorted_files("file")
+        current = self._queue.current()
+        if current in self._media_files:
+            start = files.index(current)
+            files = files[start:] + files[:start]
+        self._loudness_analyzer.analyze(os.path.join(self.media_dir, f) for f in files)
+    
+    def _prepare_waveform(self, filename):
+        """Waveform peak bytes of a track, or None after starting to compute them"""
+        file_path = os.path.join(self.media_dir, filename)
+        peaks = self._waveforms.get(file_path)
+        if peaks is not None:
+            return peaks
+            
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+            
+        peaks = self._library_index.lookup_waveform(file_path, stat)
+        if peaks is not None:
+            self._waveforms.put(file_path, peaks)
+            return peaks
+            
+        if analysis_available() and file_path not in self._waveform_pending:
+            future = self._submit_analysis(compute_waveform, file_path)
+            if future is None:
+                return None
+            self._waveform_pending.add(file_path)
+            future.add_done_callback(lambda f: self._waveform_computed(filename, file_path, stat, f))
+        return None
+    
+    def _waveform_computed(self, filename, file_path, stat, future):
+        """Pool callback: record the peaks and tell QML they are ready"""
+        try:
+            peaks = future.result()
+            self._library_index.store_waveform(file_path, stat, peaks)
+        except Exception as e:
+            # Not retried this session; the seek bar stays plain for this file
+            print(f"Waveform analysis error for {filename}: {e}")
+            peaks = b""
+        self._waveforms.put(file_path, peaks)
+        self._waveform_pending.discard(file_path)
+        self.waveformReady.emit(filename)
+    
+    @Slot(str, result=list)
+    def get_waveform(self, filename):
+        """Peaks of a track as [min, max, min, max, ...] in -1..1
+        
+        Empty until they are computed; waveformReady is emitted once they are.
+        """
+        if not filename:
+            return []
+        peaks = self._prepare_waveform(filename)
+        if not peaks:
+            return []
+        return [value / 127 for value in memoryview(peaks).cast('b')]
+    
+    @Slot(bool)
+    def set_spectrum_active(self, active):
+        """Start or stop spectrumChanged updates, e.g. as the media room is shown"""
+        if self._spectrum_analyzer:
+            self._spectrum_analyzer.set_active(active)
+    
+    @Slot(int)
+    def set_spectrum_bands(self, count):
+        """Analyse the equalizer's bands when count matches them, otherwise count log bands"""
+        if not self._spectrum_analyzer or count < 1:
+            return
+        centers = None
+        if self._equalizer_manager:
+            frequencies = self._equalizer_manager.get_equalizer_frequencies()
+            if len(frequencies) == count:
+                centers = frequencies
+        self._spectrum_analyzer.set_bands(centers or log_band_centers(count))
+    
+    @Slot(result=bool)
+    def is_spectrum_available(self):
+        return self._spectrum_analyzer is not None
+    
+    @Slot(result='QVariantMap')
+    def get_spectrum_stats(self):
+        """Frame cost and period of the spectrum analyzer; empty without one"""
+        return self._spectrum_analyzer.stats() if self._spectrum_analyzer else {}
+    
+    @Slot(bool)
+    def set_replay_gain(self, enabled):
+        """Enable or disable automatic per-track loudness gain"""
+        self._replay_gain_enabled = bool(enabled)
+        if self._replay_gain_enabled:
+            self._start_loudness_analysis()
+        else:
+            self._loudness_analyzer.cancel()
+        self._set_track_gain(self._audio_output, self._queue.current())
+        self._set_track_gain(self._next_audio_output, self._preloaded_file)
+    
+    @Slot(result=bool)
+    def is_replay_gain(self):
+        return self._replay_gain_enabled
+    
     def _update_position(self):
         """Update position for UI slider"""
         if self._player.playbackState() == QMediaPlayer.PlayingState:
             self.positionChanged.emit(self._player.position())
+            self._preload_next_track()
+    
+    def _handle_player_duration(self, player, duration):
+        """Forward duration changes of the active player"""
+        if player is self._player:
+            self.durationChanged.emit(duration)
+    
+    def _handle_player_position(self, player, position):
+        """Forward position changes of the active player and finish gap measurements"""
+        if player is not self._player:
+            return
+            
+        self.positionChanged.emit(position)
+        
+        if self._seek_started is not None and (position > self._seek_target or not self._is_playing):
+            # Playing past the target means the decoder resumed at the new spot
+            self._last_seek_latency_ms = (time.perf_counter() - self._seek_started) * 1000
+            self._seek_started = None
+            self.seekLatencyMeasured.emit(self._last_seek_latency_ms)
+        
+        if self._gap_started is not None and position > 0:
+            # Position updates are coarse, so discount audio already played
+            elapsed_ms = (time.perf_counter() - self._gap_started) * 1000
+            self._gap_started = None
+            self._last_track_gap_ms = max(0.0, elapsed_ms - position)
+            self.trackGapMeasured.emit(self._last_track_gap_ms)
             
-    def _handle_media_status(self, status):
+    def _handle_media_status(self, player, status):
         """Handle media status changes"""
         try:
+            if player is not self._player:
+                if status == QMediaPlayer.MediaStatus.InvalidMedia and self._preloaded_file:
+                    print(f"Could not preload {self._preloaded_file}, it will start without gapless playback")
+                    self._failed_preload = self._preloaded_file
+                    self._preloaded_file = None
+                return
+                
             if status == QMediaPlayer.MediaStatus.EndOfMedia:
-                print("Song ended, playing next track")
-                self.next_track()
+                ended_at = time.perf_counter()
+                if not self._start_preloaded_track():
+                    print("Song ended, playing next track")
+                    self.next_track()
+                self._gap_started = ended_at
         except Exception as e:
             print(f"Media status handling error: {e}")
+    
+    def _upcoming_file(self):
+        """The playlist entry next_track() would play"""
+        return self._queue.peek_next()
+    
+    def _preload_next_track(self):
+        """Load the upcoming track on the standby player once the current one nears its end"""
+        if not self._gapless_enabled or not self._is_playing:
+            return
+            
+        duration = self._player.duration()
+        if duration <= 0 or duration - self._player.position() > self._preload_lead_ms:
+            return
+            
+        # The playlist may have changed since the last preload
+        upcoming = self._upcoming_file()
+        if not upcoming or upcoming == self._preloaded_file:
+            return
+        if upcoming == self._failed_preload:
+            # Loading it again would fail the same way; next_track() handles it on EndOfMedia
+            return
+        self._failed_preload = None
+            
+        file_path = os.path.join(self.media_dir, upcoming)
+        if not os.path.exists(file_path):
+            return
+            
+        self._set_track_gain(self._next_audio_output, upcoming)
+        self._next_player.setSource(QUrl.fromLocalFile(file_path))
+        self._preloaded_file = upcoming
+        self._prepare_waveform(upcoming)
+    
+    def _clear_preload(self):
+        """Drop whatever the standby player has loaded"""
+        if self._preloaded_file is not None:
+            self._next_player.stop()
+            self._next_player.setSource(QUrl())
+            self._preloaded_file = None
+    
+    def _start_preloaded_track(self):
+        """Hand playback to the standby player; False if it does not hold the next track"""
+        upcoming = self._upcoming_file()
+        if not self._gapless_enabled or not upcoming or upcoming != self._preloaded_file:
+            return False
+            
+        if self._next_player.mediaStatus() not in (QMediaPlayer.MediaStatus.LoadedMedia,
+                                                   QMediaPlayer.MediaStatus.BufferedMedia):
+            return False
+            
+        self._next_player.play()
+        
+        # Swap roles; the finished player becomes the standby
+        finished = self._player
+        self._player, self._next_player = self._next_player, self._player
+        self._audio_output, self._next_audio_output = self._next_audio_output, self._audio_output
+        finished.stop()
+        finished.setSource(QUrl())
+        self._preloaded_file = None
+        if self._audio_tap:
+            self._audio_tap.set_source(self._player)
+        if self._audio_processor:
+            # Queued audio of the finished track keeps playing, so the handover stays gapless
+            self._audio_processor.set_source(self._player)
+            self._audio_processor.set_volume(self._audio_output.volume())
+        self._seek_started = None
+        
+        self._queue.next()
+        self.durationChanged.emit(self._player.duration())
+        self._announce_track(upcoming)
+        print(f"Now playing (gapless): {upcoming} at position {self._queue.position}")
+        return True
+    
+    def _announce_track(self, filename):
+        """Tell QML which track is now playing"""
+        self.currentMediaChanged.emit(filename)
+        self._emit_metadata(filename)
+        self.get_formatted_duration(filename)
+    
+    @Slot(bool)
+    def set_gapless_playback(self, enabled):
+        """Enable or disable preloading of the next track"""
+        self._gapless_enabled = bool(enabled)
+        if not self._gapless_enabled:
+            self._clear_preload()
+    
+    @Slot(result=bool)
+    def is_gapless_playback(self):
+        return self._gapless_enabled
+    
+    @Slot(result=float)
+    def get_last_track_gap(self):
+        """Silence between the last two consecutive tracks in ms, or -1 if none was measured"""
+        return self._last_track_gap_ms
+    
+    @Slot(result=float)
+    def get_last_seek_latency(self):
+        """Time the last seek took until playback resumed in ms, or -1 if none was measured"""
+        return self._last_seek_latency_ms
 
     def _cache_metadata(self, filename):
         """Cache metadata for a file to reduce disk operations"""
-        if filename in self._metadata_cache:
+        if filename in self._track_table:
             return
             
+        self._store_in_track_table(filename, self._load_metadata(self.media_dir, filename))
+    
+    def _store_in_track_table(self, filename, metadata):
+        """Add or overwrite a track's row in the in-memory track table"""
+        self._track_table.put(filename, metadata)
+    
+    def _load_metadata(self, media_dir, filename, commit=True):
+        """Load metadata from the library index, parsing the file only if it changed
+        
+        Called from scanner worker threads, so it must not touch the in-memory caches.
+        """
+        file_path = os.path.join(media_dir, filename)
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError as e:
+            print(f"Metadata caching error for {filename}: {e}")
+            return self._fallback_metadata(filename)
+        
+        # Reuse the indexed entry when the file is unchanged since it was last parsed
+        metadata = self._library_index.lookup(file_path, stat)
+        if metadata is None:
+            metadata = self._read_metadata(file_path, filename)
+            if metadata is None:
+                # Read errors may be temporary, so nothing is indexed and the next scan retries
+                return self._fallback_metadata(filename)
+            
+            # Picture locations go to the index only, not the in-memory caches
+            pictures = metadata.pop("pictures", None)
+            self._library_index.store(file_path, stat, metadata, pictures=pictures, commit=commit)
+            
+        return metadata
+    
+    def _read_metadata(self, file_path, filename):
+        """Parse tags and duration from an MP3 file
+        
+        The probe reads the ID3v2 header region and the first audio frame only;
+        files it cannot handle fall back to mutagen. Returns None if the file
+        could not be read at all.
+        """
         try:
-            file_path = os.path.join(self.media_dir, filename)
+            probe = probe_mp3(file_path)
+            metadata = {
+                "artist": probe.get("artist") or "Unknown Artist",
+                "album": probe.get("album") or "Unknown Album",
+                "title": probe.get("title") or os.path.basename(filename).replace('.mp3', ''),
+                "duration": int(probe["duration"]),
+                "pictures": self._picture_locations(probe)
+            }
+            return metadata
+        except (ProbeError, ValueError, struct.error) as e:
+            print(f"Probe could not read {filename} ({e}), using full tag parser")
+        except OSError as e:
+            print(f"Metadata caching error for {filename}: {e}")
+            return None
             
-            # Manage cache size
-            if len(self._metadata_cache) >= self._metadata_cache_max:
-                # Remove oldest entry
-                self._metadata_cache.pop(next(iter(self._metadata_cache)))
-                
+        return self._read_metadata_mutagen(file_path, filename)
+    
+    def _read_metadata_mutagen(self, file_path, filename):
+        """Parse tags and duration with mutagen, reading the file twice; None if it cannot be read"""
+        try:
             # Read metadata once
             audio = ID3(file_path)
             mp3 = MP3(file_path)
             
             # Store all required metadata at once
-            self._metadata_cache[filename] = {
+            return {
                 "artist": self._extract_id3_text(audio.get('TPE1'), "Unknown Artist"),
                 "album": self._extract_id3_text(audio.get('TALB'), "Unknown Album"),
-                "title": self._extract_id3_text(audio.get('TIT2'), filename.replace('.mp3', '')),
+                "title": self._extract_id3_text(audio.get('TIT2'), os.path.basename(filename).replace('.mp3', '')),
                 "duration": int(mp3.info.length)
             }
+        except OSError as e:
+            print(f"Metadata caching error for {filename}: {e}")
+            return None
         except Exception as e:
             print(f"Metadata caching error for {filename}: {e}")
-            # Set fallback values
-            self._metadata_cache[filename] = {
-                "artist": "Unknown Artist",
-                "album": "Unknown Album",
-                "title": filename.replace('.mp3', ''),
-                "duration": 0
-            }
+            return self._fallback_metadata(filename)
+    
+    def _fallback_metadata(self, filename):
+        """Metadata used when a file cannot be parsed"""
+        return {
+            "artist": "Unknown Artist",
+            "album": "Unknown Album",
+            "title": os.path.basename(filename).replace('.mp3', ''),
+            "duration": 0
+        }
     
     def _extract_id3_text(self, tag, default=""):
         """Helper to safely extract text from ID3 tags"""
@@ -238,120 +1025,423 @@ class MediaManager(QObject):
 
     def _emit_metadata(self, filename):
         """Emit metadata change signals"""
-        if filename not in self._metadata_cache:
-            self._cache_metadata(filename)
-            
-        meta = self._metadata_cache[filename]
+        self._cache_metadata(filename)
         self.metadataChanged.emit(
-            meta.get("title", filename.replace('.mp3', '')),
-            meta.get("artist", "Unknown Artist"),
-            meta.get("album", "Unknown Album")
+            self._track_table.title(filename),
+            self._track_table.artist(filename),
+            self._track_table.album(filename)
         )
         
-    def _get_album_id(self, filename):
-        """Create a unique ID for album art caching"""
-        try:
-            if filename not in self._metadata_cache:
-                self._cache_metadata(filename)
-                
-            meta = self._metadata_cache[filename]
-            # Create unique ID from album and artist
-            return f"{meta['album']}_{meta['artist']}"
-        except Exception as e:
-            print(f"Error getting album ID: {e}")
-            return str(hash(filename))
-        
-    def _manage_cache(self, new_album_id):
-        """More efficient cache management using LRU approach"""
-        try:
-            if len(self._album_art_cache) >= self._max_cache_files:
-                # Find least recently accessed item, excluding the new one
-                items = [(k, v) for k, v in self._access_count.items() if k != new_album_id]
-                if not items:
-                    return
-                    
-                # Find least used album art
-                least_used = min(items, key=lambda x: x[1])[0]
-                
-                # Remove it from cache
-                if least_used in self._album_art_cache:
-                    file_path = self._album_art_cache[least_used].replace('file:///', '')
-                    try:
-                        if os.path.exists(file_path):
-                            os.remove(file_path)
-                    except Exception as e:
-                        print(f"Warning: Could not remove file {file_path}: {e}")
-                    finally:
-                        del self._album_art_cache[least_used]
-                        del self._access_count[least_used]
-                        
-                print(f"Cache managed. New size: {len(self._album_art_cache)}")
-        except Exception as e:
-            print(f"Cache management error: {e}")
+    @Slot(result='QVariantMap')
+    def get_cache_stats(self):
+        """Hit, miss and eviction counters for the in-memory caches"""
+        return {
+            "metadata": self._track_table.stats(),
+            "albumArt": self.album_art_provider.lookup_cache_stats(),
+            "images": self.album_art_provider.image_cache_stats()
+        }
 
     @Slot()
     def invalidate_stats_cache(self):
         """Mark the statistics cache as invalid to force recalculation"""
-        self._stats_cache["is_valid"] = False  
+        self._stats_valid = False
+        
+        # Results from a running scan are stale now
+        if self._scan_in_progress:
+            self._scanner.cancel()
+            self._scan_in_progress = False
                 
-    @Slot()
-    def _clear_temp_files(self):
-        """Improved temp file management with error handling"""
-        if os.path.exists(self.temp_dir):
-            for file in os.listdir(self.temp_dir):
+    @Slot(result=list)
+    def get_media_files(self, emit_signal=True):
+        """Get list of available MP3 files"""
+        try:
+            # The folder is listed once; afterwards the watcher keeps the set current
+            if self._media_files_dir != self.media_dir:
+                self._load_media_files()
+                
+            # Only emit signal if requested
+            if emit_signal:
+                self.mediaListChanged.emit(self._media_files_list)
+                
+        except Exception as e:
+            print(f"Error getting media files: {e}")
+                
+        return list(self._media_files_list)
+    
+    def _list_media_tree(self, rel_root=""):
+        """Synchronously list MP3 files and directories under rel_root"""
+        directories = []
+        files = set()
+        if not os.path.isdir(self.media_dir):
+            return directories, files
+            
+        for rel_dir, names in iter_media_tree(self.media_dir, rel_root, self._recursive_scan, self._library_index):
+            directories.append(rel_dir)
+            files.update(names)
+        self._library_index.commit()
+        return directories, files
+    
+    def _watch_directories(self, rel_dirs):
+        """Add filesystem watches for media directories, up to the watch limit"""
+        room = self._max_watched_dirs - len(self._watcher.directories())
+        if room <= 0:
+            return
+            
+        paths = [os.path.join(self.media_dir, d) if d else self.media_dir for d in rel_dirs[:room]]
+        self._watcher.addPaths(paths)
+    
+    def _load_media_files(self):
+        """Read the media folder and start watching it for changes
+        
+        A flat folder is listed inline. In recursive mode the tree is walked on a
+        background thread and files stream in through _handle_files_found.
+        """
+        watched = self._watcher.directories()
+        if watched:
+            self._watcher.removePaths(watched)
+        self._walker.cancel()
+        self._walk_in_progress = False
+            
+        self._media_files_dir = self.media_dir
+        self._queue.set_tracks([])
+        
+        if self._restore_directory_state():
+            return
+            
+        self._media_files = set()
+        self._media_files_list = []
+        self._sort_index.clear()
+        self._search_index.clear()
+        self._track_model.reset([])
+        self._library_stats.clear()
+        self._publish_stats()
+        
+        if not os.path.isdir(self.media_dir):
+            return
+        
+        if self._recursive_scan:
+            self._walk_in_progress = True
+            self._walk_generation = self._walker.walk(self.media_dir, recursive=True)
+            return
+            
+        directories, files = self._list_media_tree()
+        self._media_files = files
+        self._media_files_list = sorted(files)
+        # File order is needed right away; tags and the search index follow from the scan
+        self._sort_index.update_many((f, self._cached_or_fallback_metadata(f)) for f in files)
+        self._watch_directories(directories)
+        self._prune_library_index()
+        self._refresh_track_model()
+    
+    def _prune_library_index(self):
+        """Drop index rows of files no longer in the media folder after a complete listing"""
+        # An empty listing may be an unmounted drive's mount point, so nothing is pruned
+        if not self._media_files:
+            return
+        pruned = self._library_index.prune(self.media_dir, self._media_files, self._recursive_scan)
+        if pruned:
+            print(f"Pruned {pruned} removed files from the library index")
+    
+    def _retain_directory_state(self):
+        """Set aside everything derived from the current folder before switching away
+        
+        The listing, indexes, statistics and caches are moved into
+        _directory_states as they are; fresh objects take their place. A folder
+        still being walked, or one too large for the memory budget, is dropped
+        instead. Either way nothing of it stays visible under the new folder.
+        """
+        estimate = len(self._media_files) * self._retained_bytes_per_track
+        if (self._media_files_dir is not None and not self._walk_in_progress
+                and estimate <= self._max_retained_bytes):
+            # Directory mtimes tell on return which folders changed in the meantime
+            dir_mtimes = {}
+            for path in self._watcher.directories():
                 try:
-                    file_path = os.path.join(self.temp_dir, file)
-                    if os.path.isfile(file_path):
-                        os.remove(file_path)
-                except Exception as e:
-                    print(f"Error removing temp file {file}: {e}")
+                    dir_mtimes[path] = os.stat(path).st_mtime_ns
+                except OSError:
+                    pass
                     
-        # Make sure directory exists
+            self._directory_states.put((self._media_files_dir, self._recursive_scan), {
+                "media_files": self._media_files,
+                "media_files_list": self._media_files_list,
+                "sort_index": self._sort_index,
+                "search_index": self._search_index,
+                "library_stats": self._library_stats,
+                "stats_valid": self._stats_valid and not self._scan_in_progress,
+                "track_table": self._track_table,
+                "dir_mtimes": dir_mtimes,
+                "bytes": estimate
+            })
+        
+        self._media_files = set()
+        self._media_files_list = []
+        self._sort_index = SortIndex()
+        self._search_index = SearchIndex()
+        self._library_stats = LibraryStats()
+        self._track_table = TrackTable()
+        self._media_files_dir = None
+    
+    def _restore_directory_state(self):
+        """Bring back the retained state of media_dir; False if there is none"""
+        state = self._directory_states.pop((self.media_dir, self._recursive_scan))
+        if state is None:
+            return False
+            
+        self._media_files = state["media_files"]
+        self._media_files_list = state["media_files_list"]
+        self._sort_index = state["sort_index"]
+        self._search_index = state["search_index"]
+        self._library_stats = state["library_stats"]
+        self._stats_valid = state["stats_valid"]
+        self._track_table = state["track_table"]
+        
+        self._track_model.reset(self.sort_media_files(*self._track_model_sort))
+        self._publish_stats()
+        
+        existing = [path for path in state["dir_mtimes"] if os.path.isdir(path)]
+        if existing:
+            self._watcher.addPaths(existing)
+            
+        # Folders touched while another library was shown are reconciled as usual
+        changed = 0
+        for path, mtime_ns in state["dir_mtimes"].items():
+            try:
+                current = os.stat(path).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime_ns:
+                self._handle_directory_changed(path)
+                changed += 1
+                
+        print(f"Restored media folder {self.media_dir}: {len(self._media_files)} files, "
+              f"{changed} changed folders")
+        self._start_loudness_analysis()
+        return True
+    
+    def _cached_or_fallback_metadata(self, filename):
+        """Metadata already in memory, or placeholders until the scanner reads the file"""
+        return self._track_table.get(filename) or self._fallback_metadata(filename)
+    
+    def _alphabetical_playlist(self):
+        """Media files in playlist order, served from the sort index"""
+        if self._media_files_dir != self.media_dir:
+            self._load_media_files()
+        return self._sort_index.sorted_files("file")
+    
+    @Slot(int, list, list)
+    def _handle_files_found(self, generation, directories, files):
+        """Merge a chunk of files streamed from the tree walk"""
+        if generation != self._walk_generation:
+            return
+            
         try:
-            if not os.path.exists(self.temp_dir):
-                os.makedirs(self.temp_dir)
+            new_files = [f for f in files if f not in self._media_files]
+            self._media_files.update(new_files)
+            self._media_files_list.extend(new_files)
+            self._watch_directories(directories)
+            
+            if new_files:
+                self._add_tracks(new_files)
+                self.mediaFilesAdded.emit(new_files)
         except Exception as e:
-            print(f"Error creating temp directory: {e}")
+            print(f"Error adding discovered files: {e}")
+    
+    @Slot(int)
+    def _handle_walk_finished(self, generation):
+        """Finish the initial listing and start reading tags"""
+        if generation != self._walk_generation:
+            return
+            
+        self._walk_in_progress = False
+        self._media_files_list.sort()
+        print(f"Media folder walk finished: {len(self._media_files)} files")
+        self._prune_library_index()
+        self._calculate_all_stats()
+    
+    @Slot(bool)
+    def set_recursive_scan(self, enabled):
+        """Include MP3 files in subfolders of the media folder"""
+        if enabled == self._recursive_scan:
+            return
+            
+        self._retain_directory_state()
+        self.invalidate_stats_cache()
+        self._recursive_scan = enabled
+        self._media_files_dir = None
+        self.get_media_files()
+        self._calculate_all_stats()
+    
+    def _handle_directory_changed(self, path):
+        """Defer reconciling until a burst of filesystem events settles"""
+        if self._media_files_dir != self.media_dir:
+            return
+            
+        rel_dir = os.path.relpath(path, self.media_dir).replace(os.sep, '/')
+        self._changed_dirs.add("" if rel_dir == "." else rel_dir)
+        self._rescan_timer.start()
+    
+    def _reconcile_media_files(self):
+        """Apply files added to or removed from the watched folders"""
+        try:
+            if self._media_files_dir != self.media_dir or self._walk_in_progress:
+                self._changed_dirs.clear()
+                return
+            
+            # An unmounted drive or a removed folder is unavailable, not empty
+            if not os.path.isdir(self.media_dir):
+                print(f"Media folder {self.media_dir} is unavailable; keeping the library as it is")
+                self._changed_dirs.clear()
+                return
+            
+            changed_dirs = self._changed_dirs
+            self._changed_dirs = set()
+            
+            added = set()
+            removed = set()
+            retagged = []
+            for rel_dir in changed_dirs:
+                # Nested folders are only listed again if their mtime changed
+                directories, current = self._list_media_tree(rel_dir)
+                prefix = f"{rel_dir}/" if rel_dir else ""
+                known = {f for f in self._media_files if f.startswith(prefix)} if prefix else self._media_files
+                added |= current - known
+                removed |= known - current
                 
-    def _shuffle_playlist(self):
-        """Helper method to create shuffled playlist"""
-        files = self.get_media_files()
-        if not files:
-            return []
+                # Tag editors rewrite files in place; the index notices the new size or mtime
+                retagged.extend(self._rewritten_files(rel_dir, current & known))
+                
+                # Re-add watches dropped because a folder was replaced or newly created
+                watched = set(self._watcher.directories())
+                self._watch_directories([d for d in directories
+                                         if (os.path.join(self.media_dir, d) if d else self.media_dir) not in watched])
+            
+            if retagged:
+                self._retag_tracks(retagged)
             
-        shuffled = files.copy()
-        random.shuffle(shuffled)
-        return shuffled
+            added = sorted(added)
+            removed = sorted(removed)
+            if not added and not removed:
+                return
                 
-    @Slot(result=list)
-    def get_media_files(self, emit_signal=True):
-        """Get list of available MP3 files"""
-        mp3_files = []
-        try:
-            if os.path.exists(self.media_dir):
-                for file in os.listdir(self.media_dir):
-                    if file.lower().endswith('.mp3'):
-                        mp3_files.append(file)
-                        
-                # Only emit signal if requested
-                if emit_signal:
-                    self.mediaListChanged.emit(mp3_files)
+            self._media_files = (self._media_files - set(removed)) | set(added)
+            self._media_files_list = sorted(self._media_files)
+            
+            if removed:
+                self._remove_tracks(removed)
+                self.mediaFilesRemoved.emit(removed)
+                
+            if added:
+                self._add_tracks(added)
+                self.mediaFilesAdded.emit(added)
                 
+            print(f"Media folder changed: {len(added)} added, {len(removed)} removed")
         except Exception as e:
-            print(f"Error getting media files: {e}")
+            print(f"Error reconciling media folder: {e}")
+    
+    def _sync_queue(self):
+        """Rebuild the play queue from the library order, keeping the current song"""
+        if len(self._queue):
+            self._queue.set_tracks(self._sort_index.sorted_files("file"))
+    
+    def _ensure_queue(self):
+        """Fill the play queue from the library on first use"""
+        if not len(self._queue):
+            self._queue.set_tracks(self._alphabetical_playlist())
+        return len(self._queue) > 0
+    
+    def _rewritten_files(self, rel_dir, candidates):
+        """Scanned files directly in rel_dir whose size or mtime differs from the index
+        
+        Sizes and mtimes come from one directory scan and one index query, so
+        unchanged files cost neither a stat call nor a lookup of their own.
+        """
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        abs_dir = os.path.join(self.media_dir, rel_dir) if rel_dir else self.media_dir
+        indexed = self._library_index.file_stats(os.path.join(self.media_dir, prefix))
+        
+        rewritten = []
+        try:
+            with os.scandir(abs_dir) as entries:
+                for entry in entries:
+                    filename = prefix + entry.name
+                    if filename not in candidates or filename not in self._library_stats:
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if indexed.get(os.path.join(self.media_dir, filename)) != (stat.st_size, stat.st_mtime_ns):
+                        rewritten.append(filename)
+        except OSError as e:
+            print(f"Error checking {abs_dir} for rewritten files: {e}")
+        return rewritten
+    
+    def _remove_tracks(self, removed):
+        """Drop removed files from the playlist, caches and statistics"""
+        self._sort_index.remove_many(removed)
+        self._search_index.remove_many(removed)
+        self._sync_queue()
                 
-        return mp3_files
+        # Index rows are kept: they are validated by size and mtime on lookup, so a
+        # file that comes back is not parsed again. _prune_library_index drops them later.
+        for filename in removed:
+            self._track_table.pop(filename)
+            self._library_stats.remove(filename)
+            
+        self._publish_stats()
+            
+        self._refresh_track_model()
+    
+    def _add_tracks(self, added):
+        """Insert new files into the playlist and scan them for statistics"""
+        # Only tracks whose tags were already read are searchable now; the rest
+        # are indexed when their scan results arrive
+        self._sort_index.update_many((f, self._cached_or_fallback_metadata(f)) for f in added)
+        self._search_index.update_many(
+            (f, self._track_table.get(f)) for f in added if self._track_table.get(f) is not None)
+        
+        # In shuffle mode new songs land in the part of the cycle not yet played
+        self._sync_queue()
+        self._refresh_track_model()
+        
+        if self._scan_in_progress:
+            # A full scan is already running against an outdated listing; tracks
+            # it already counted are simply re-applied with the same contribution
+            self.invalidate_stats_cache()
+            self._calculate_all_stats()
+        elif self._stats_valid:
+            # Only the new files need reading; running totals already cover the rest
+            self._stats_valid = False
+            self._scan_in_progress = True
+            self._scan_generation = self._scanner.scan(self.media_dir, added)
+        else:
+            self._calculate_all_stats()
+    
+    def _retag_tracks(self, filenames):
+        """Re-read tags of files rewritten in place and update everything derived from them"""
+        results = [(f, self._load_metadata(self.media_dir, f, commit=False)) for f in filenames]
+        self._library_index.commit()
+        
+        for filename, metadata in results:
+            self._store_in_track_table(filename, metadata)
+            self._waveforms.pop(os.path.join(self.media_dir, filename))
+        self._sort_index.update_many(results)
+        self._search_index.update_many(results)
+        
+        if self._library_stats.update_many(results):
+            self._publish_stats()
+            
+        # A retag may have replaced the cover as well
+        self.album_art_provider.invalidate()
+        self._track_model.refresh(filenames)
+        self._refresh_track_model()
     
     @Slot(str, result=str)
     def get_formatted_duration(self, filename):
         """Get formatted duration string (MM:SS)"""
         try:
-            if filename not in self._metadata_cache:
-                self._cache_metadata(filename)
-                
-            duration_seconds = self._metadata_cache[filename]["duration"]
-            minutes = duration_seconds // 60
-            seconds = duration_seconds % 60
+            self._cache_metadata(filename)
+            minutes, seconds = divmod(self._track_table.duration(filename), 60)
             formatted = f"{minutes}:{seconds:02d}"
             self.durationFormatChanged.emit(formatted)
             return formatted
@@ -362,155 +1452,146 @@ class MediaManager(QObject):
     @Slot(str, result=str)
     def get_band(self, filename):
         """Get artist name from metadata"""
-        if filename not in self._metadata_cache:
-            self._cache_metadata(filename)
-        return self._metadata_cache[filename]["artist"]
+        self._cache_metadata(filename)
+        return self._track_table.artist(filename)
 
     @Slot(str, result=str)
     def get_album(self, filename):
         """Get album name from metadata"""
-        if filename not in self._metadata_cache:
-            self._cache_metadata(filename)
-        return self._metadata_cache[filename]["album"]
+        self._cache_metadata(filename)
+        return self._track_table.album(filename)
 
-    @Slot(str, result=str)
-    def get_album_art(self, filename):
-        """Extract and cache album art"""
+    def _art_hash_for_track(self, file_path):
+        """Look up or extract the cover of a file
+        
+        Also called from QML image loading threads, so it only touches the
+        thread-safe library index and art store.
+        """
         try:
-            album_id = self._get_album_id(filename)
+            stat = os.stat(file_path)
+        except OSError:
+            return ""
             
-            # Update access count for LRU cache
-            self._access_count[album_id] = self._access_count.get(album_id, 0) + 1
-
-            # Return if already cached
-            if album_id in self._album_art_cache:
-                return self._album_art_cache[album_id]
+        # The index remembers which stored cover a file uses, or that it has none
+        art_hash = self._library_index.lookup_art(file_path, stat)
+        if art_hash is None or (art_hash and not self._art_store.contains(art_hash)):
+            art_hash = self._extract_album_art(file_path, stat)
+            self._library_index.store_art(file_path, stat, art_hash)
+        elif art_hash and art_hash not in self._touched_art:
+            self._art_store.touch(art_hash)
+            self._touched_art.add(art_hash)
+        return art_hash
+    
+    def _extract_album_art(self, file_path, stat):
+        """Copy the first embedded cover of a file into the art store
+        
+        The cover is sliced out of a memory map at the offset recorded by the
+        scan, so neither the tag nor the other images are parsed or copied.
+        """
+        pictures = self._library_index.lookup_pictures(file_path, stat)
+        if pictures is None:
+            try:
+                pictures = self._picture_locations(probe_mp3(file_path))
+            except (ProbeError, OSError, ValueError, IndexError, struct.error):
+                return self._extract_album_art_mutagen(file_path)
+            if pictures is None:
+                return self._extract_album_art_mutagen(file_path)
+                
+        # If multiple APICs, only the first is used for now
+        if not pictures:
+            return ""
+        offset, length, mime = pictures[0]
+        if length <= 0 or offset + length > stat.st_size:
+            return self._extract_album_art_mutagen(file_path)
             
-            # Manage cache BEFORE adding new entry
-            self._manage_cache(album_id)
-
-            # Extract and cache new album art
-            file_path = os.path.join(self.media_dir, filename)
+        try:
+            with open(file_path, 'rb') as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)[offset:offset + length]
+                    try:
+                        return self._art_store.put(view, mime)
+                    finally:
+                        view.release()
+        except (OSError, ValueError) as e:
+            print(f"Error reading album art from {file_path}: {e}")
+            return ""
+    
+    def _picture_locations(self, probe):
+        """(offset, length, mime) of each picture a probe located, None if some were not"""
+        if probe["apic"] is None:
+            return None
+        return [(p["offset"], p["length"], p["mime"]) for p in probe["apic"]]
+    
+    def _extract_album_art_mutagen(self, file_path):
+        """Copy the first embedded cover using a full tag parse"""
+        try:
             audio = ID3(file_path)
+        except Exception as e:
+            print(f"Error reading album art from {file_path}: {e}")
+            return ""
+        
+        # If multiple APICs, only the first is used for now
+        for tag in audio.values():
+            if tag.FrameID == 'APIC':
+                return self._art_store.put(tag.data, tag.mime)
+        return ""
             
-            found_apic = False
-            apic_index = 0
-            for tag in audio.values():
-                if tag.FrameID == 'APIC':
-                    found_apic = True
-                    # Determine file extension from MIME type
-                    mime = tag.mime.lower()
-                    if mime == 'image/jpeg' or mime == 'image/jpg':
-                        ext = 'jpg'
-                    elif mime == 'image/png':
-                        ext = 'png'
-                    elif mime == 'image/gif':
-                        ext = 'gif'
-                    else:
-                        ext = 'img'  # fallback
-
-                    # Create a unique name for this album art (support multiple APIC frames)
-                    temp_path = os.path.join(self.temp_dir, f'cover_{hash((album_id, apic_index))}.{ext}')
-                    
-                    # Write the image data
-                    with open(temp_path, 'wb') as img_file:
-                        img_file.write(tag.data)
-                    
-                    # Convert to URL and cache (cache only the first one for this album_id)
-                    if album_id not in self._album_art_cache:
-                        url = QUrl.fromLocalFile(temp_path).toString()
-                        self._album_art_cache[album_id] = url
-                        # Optionally, you could return here if you only want the first image
-                        return url
-                    apic_index += 1
-
-            if not found_apic:
+    @Slot(str, result=str)
+    def get_album_art(self, filename):
+        """Get an image://albumart URL for a file, or "" without a file
+        
+        The cover is looked up and extracted by the provider on QML's image
+        loading threads; tracks without one get the missing art image. QML
+        decides the decoded size through the Image's sourceSize.
+        """
+        try:
+            if not filename:
                 return ""
-            # If multiple APICs, only the first is returned/cached for now
-            return self._album_art_cache.get(album_id, "")
+            return f"image://albumart/{encode_track_id(os.path.join(self.media_dir, filename))}"
         except Exception as e:
             print(f"Error getting album art: {e}")
             return ""
-            
+    
     @Slot(result=str)
     def get_current_file(self):
-        
         """Get currently playing file without auto-playing"""
-        # Initialize playlist if empty
-        if not self._current_playlist:
-            files = self.get_media_files()
-            if files:
-
-                self._current_playlist = sorted(files, key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-                self._current_index = 0
-                # Return the first file from the sorted playlist but don't play it
-                return self._current_playlist[0]
-                
-        # Return current file if index is valid
-        if 0 <= self._current_index < len(self._current_playlist):
-            return self._current_playlist[self._current_index]
-        
-        # Fallback to first file if index is invalid
-        files = self.get_media_files()
-        if files:
-            self._current_playlist = sorted(files, key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-            self._current_index = 0
-            return self._current_playlist[0]
-            
-        return ""
+        if not self._ensure_queue():
+            return ""
+        return self._queue.current()
     
     @Slot(str)
     def play_file(self, filename):
         """Play specified file"""
-        # Initialize current_playlist if needed
-        if not self._current_playlist:
-            try:
-                self._current_playlist = self._shuffle_playlist() if self._shuffle else sorted(self.get_media_files(), key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-            except Exception as e:
-                print(f"Error initializing playlist: {e}")
-                self._current_playlist = []
-                
         # Only proceed if we have files
-        if not self._current_playlist:
+        if not self._ensure_queue():
             print("No media files available to play")
             return
 
-        # Try to find the file in the playlist
-        try:
-            if filename in self._current_playlist:
-                self._current_index = self._current_playlist.index(filename)
-            elif not self._shuffle:
-                # If not found and not shuffled, rebuild alphabetical playlist
-                self._current_playlist = sorted(self.get_media_files(), key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-                if filename in self._current_playlist:
-                    self._current_index = self._current_playlist.index(filename)
-                else:
-                    # File not found in any playlist, use the first file
-                    filename = self._current_playlist[0] if self._current_playlist else ""
-                    self._current_index = 0
-        except Exception as e:
-            print(f"Error finding file in playlist: {e}")
-            # Fallback to first file
-            self._current_index = 0
-            if self._current_playlist:
-                filename = self._current_playlist[0]
-            else:
-                return
+        # Jumping records the previous song in the queue history
+        if not self._queue.jump(filename):
+            # The library may have changed since the queue was built
+            self._sync_queue()
+            if not self._queue.jump(filename):
+                # File not found in the library, use the current one
+                filename = self._queue.current()
         
         # Play the file
         file_path = os.path.join(self.media_dir, filename)
         if os.path.exists(file_path):
             try:
+                self._gap_started = None
+                self._seek_started = None
+                self._set_track_gain(self._audio_output, filename)
+                if self._audio_processor:
+                    self._audio_processor.flush()
                 url = QUrl.fromLocalFile(file_path)
                 self._player.setSource(url)
                 self._player.play()
                 self._is_playing = True
                 self._is_paused = False
                 self.playStateChanged.emit(True)
-                self.currentMediaChanged.emit(filename)  
-                self._emit_metadata(filename)
-                self.get_formatted_duration(filename)
-                print(f"Now playing: {filename} from {'shuffled' if self._shuffle else 'alphabetical'} playlist at position {self._current_index}")
+                self._announce_track(filename)
+                print(f"Now playing: {filename} from {'shuffled' if self._queue.shuffle else 'alphabetical'} playlist at position {self._queue.position}")
                 
                 # Start audio processor if available and connected
                 if self._equalizer_active and hasattr(self, '_audio_processor') and self._audio_processor:
@@ -525,35 +1606,31 @@ class MediaManager(QObject):
     def next_track(self):
         """Play next track in playlist"""
         try:
-            if not self._current_playlist:
-                self._current_playlist = sorted(self.get_media_files(), key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-                
-            if not self._current_playlist:
+            if not self._ensure_queue():
                 print("No media files available")
                 return
                 
-            self._current_index = (self._current_index + 1) % len(self._current_playlist)
-            next_song = self._current_playlist[self._current_index]
-            self.play_file(next_song)
+            self.play_file(self._queue.next())
         except Exception as e:
             print(f"Error in next_track: {e}")
 
     @Slot()
     def previous_track(self):
-        """Play previous track in playlist"""
+        """Play previous track; in shuffle mode this is the song actually played before"""
         try:
-            if not self._current_playlist:
-                self._current_playlist = sorted(self.get_media_files(), key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-                
-            if not self._current_playlist:
+            if not self._ensure_queue():
                 print("No media files available")
                 return
                 
-            self._current_index = (self._current_index - 1) % len(self._current_playlist)
-            prev_song = self._current_playlist[self._current_index]
-            self.play_file(prev_song)
+            self.play_file(self._queue.previous())
         except Exception as e:
             print(f"Error in previous_track: {e}")
+    
+    @Slot(str)
+    def enqueue_file(self, filename):
+        """Play a file after the current one"""
+        if self._ensure_queue() and not self._queue.enqueue(filename):
+            print(f"Cannot enqueue {filename}: not in the library")
         
     @Slot()
     def pause(self):
@@ -619,16 +1696,20 @@ class MediaManager(QObject):
     @Slot(int)
     def set_position(self, position):
         """Set playback position in ms"""
+        self._seek_target = position
+        self._seek_started = time.perf_counter()
+        if self._audio_processor:
+            self._audio_processor.flush()
         self._player.setPosition(position)
 
     @Slot()
     def toggle_mute(self):
         """Toggle mute state"""
         if self._is_muted:
-            self._audio_output.setVolume(self._previous_volume)
+            self._set_output_volume(self._previous_volume)
         else:
-            self._previous_volume = self._audio_output.volume()
-            self._audio_output.setVolume(0.0)
+            self._previous_volume = self._volume
+            self._set_output_volume(0.0)
             
         self._is_muted = not self._is_muted
         self.muteChanged.emit(self._is_muted)
@@ -648,7 +1729,7 @@ class MediaManager(QObject):
             volume = max(0.0, min(1.0, volume))
             
             #print(f"Volume set to: {volume}")
-            self._audio_output.setVolume(volume)
+            self._set_output_volume(volume)
             self.volumeChanged.emit(volume)
             
             # If volume is being set and we were muted, unmute
@@ -661,80 +1742,52 @@ class MediaManager(QObject):
     @Slot(result=float)
     def getVolume(self):
         """Get current volume level (0.0-1.0)"""
-        return self._audio_output.volume()
+        return self._volume
     
     @Slot()
     def toggle_shuffle(self):
         """Toggle shuffle mode"""
-        self._shuffle = not self._shuffle
-        self.shuffleStateChanged.emit(self._shuffle)
-        
-        # Get current song before changing playlists
-        current_song = self.get_current_file()
-        files = self.get_media_files()
-        
-        if self._shuffle:
-            # Store original order if needed
-            if not self._original_files:
-                self._original_files = files.copy()
-            
-            # Create shuffled playlist
-            shuffled = files.copy()
-            random.shuffle(shuffled)
-            
-            # Move current song to start of shuffled list if it exists
-            if current_song in shuffled:
-                idx = shuffled.index(current_song)
-                if idx > 0:  # Only swap if not already at position 0
-                    shuffled[0], shuffled[idx] = shuffled[idx], shuffled[0]
-                
-            self._current_playlist = shuffled
-            self._current_index = 0
-            print(f"Shuffle enabled, starting from: {current_song}")
-        else:
-            # Get alphabetical list
-            alphabetical = sorted(files, key=lambda x: re.sub(r'[^\w\s]|_', '', x.lower()))
-            
-            # Find current song in alphabetical order
-            if current_song and current_song in alphabetical:
-                self._current_index = alphabetical.index(current_song)
-                self._current_playlist = alphabetical
-                print(f"Shuffle disabled. Continuing alphabetically from: {current_song}")
-            else:
-                self._current_playlist = alphabetical
-                self._current_index = 0
+        self._ensure_queue()
+        self._queue.set_shuffle(not self._queue.shuffle)
+        self.shuffleStateChanged.emit(self._queue.shuffle)
+        print(f"Shuffle {'enabled' if self._queue.shuffle else 'disabled'}, continuing from: {self._queue.current()}")
         
         # Update UI
-        self.mediaListChanged.emit(self._current_playlist)
+        self._refresh_track_model()
         
     @Slot(result=bool)
     def is_shuffled(self):
         """Return current shuffle state"""
-        return self._shuffle
+        return self._queue.shuffle
 
     @Slot(QObject)
     def connect_settings_manager(self, settings_manager):
         self._settings_manager = settings_manager
         # Update media directory from settings
         if self._settings_manager:
+            self._recursive_scan = self._settings_manager.scanSubfolders
             self.update_media_directory(self._settings_manager.mediaFolder)
             # Connect to future changes
             self._settings_manager.mediaFolderChanged.connect(self.update_media_directory)
+            self._settings_manager.scanSubfoldersChanged.connect(self.set_recursive_scan)
             
     def update_media_directory(self, directory):
         if os.path.exists(directory) and os.path.isdir(directory):
             old_dir = self.media_dir
-            self.media_dir = directory
             
-            # Clear caches that depend on the previous directory
-            self._metadata_cache = {}
-            self._album_art_cache = {}
-            self._access_count = {}
+            # Set the previous folder's state aside for a quick switch back; its tags
+            # and covers never carry over to same-named files in the new folder
+            self._retain_directory_state()
             self.invalidate_stats_cache()
+            self.media_dir = directory
+            self.album_art_provider.invalidate()
             
-            # Refresh media files
+            # Refresh media files; a recently used folder is restored instead of rescanned
             self.get_media_files()
             
+            # Rebuild statistics for the new folder in the background
+            self._calculate_all_stats()
+            
             # If currently playing, try to continue with same file or reset
             current_file = self.get_current_file()
             if self._is_playing and current_file and os.path.exists(os.path.join(self.media_dir, current_file)):
@@ -746,6 +1799,7 @@ class MediaManager(QObject):
                     self.play_file(files[0])
                 else:
                     self._player.stop()
+                    self._clear_preload()
                     self._is_playing = False
                     self._is_paused = True
                     self.playStateChanged.emit(False)
@@ -760,9 +1814,7 @@ class MediaManager(QObject):
                 self.media_dir = directory
                 
                 # Clear caches that depend on the previous directory
-                self._metadata_cache = {}
-                self._album_art_cache = {}
-                self._access_count = {}
+                self._track_table.clear()
                 
                 # Refresh media files
                 self.get_media_files()
@@ -794,56 +1846,80 @@ class MediaManager(QObject):
         return self.default_media_dir
         
     def _calculate_all_stats(self):
-        """Calculate all statistics at once and cache the results"""
-        if self._stats_cache["is_valid"]:
+        """Start a background scan to recalculate statistics if the cache is stale
+        
+        Results stream in through _handle_scan_batch; until then the last known
+        values are returned.
+        """
+        if self._stats_valid or self._scan_in_progress or self._walk_in_progress:
             return
             
+        self._start_library_scan()
+    
+    def _start_library_scan(self):
+        """Scan the current media folder on the worker pool"""
         try:
-            files = self.get_media_files()
+            files = self.get_media_files(emit_signal=False)
             
-            # Initialize calculation variables
-            total_ms = 0
-            albums = set()
-            artists = set()
+            # Totals are kept; rescanned tracks replace their own contribution
+            self._stats_valid = False
+            self._scan_in_progress = True
             
-            # Process all files in a single pass
-            for filename in files:
-                if filename not in self._metadata_cache:
-                    self._cache_metadata(filename)
-                    
-                # Duration
-                duration_seconds = self._metadata_cache[filename]["duration"]
-                total_ms += duration_seconds * 1000
+            self._scan_generation = self._scanner.scan(self.media_dir, files)
+        except Exception as e:
+            print(f"Error starting library scan: {e}")
+            self._scan_in_progress = False
+    
+    def _publish_stats(self):
+        """Notify QML of the current totals"""
+        self.totalDurationChanged.emit(self._format_duration(self._library_stats.total_duration_ms))
+        self.albumCountChanged.emit(self._library_stats.album_count)
+        self.artistCountChanged.emit(self._library_stats.artist_count)
+    
+    @Slot(int, list)
+    def _handle_scan_batch(self, generation, results):
+        """Merge a batch of scanned tracks into the caches and statistics"""
+        if generation != self._scan_generation:
+            return
+            
+        try:
+            # Files deleted while the scan was running must not be counted
+            results = [(f, metadata) for f, metadata in results if f in self._media_files]
+            for filename, metadata in results:
+                self._store_in_track_table(filename, metadata)
+            
+            # Artist and album keys were placeholders until the tags were read
+            self._sort_index.update_many(results)
+            self._search_index.update_many(results)
+            
+            # Visible rows pick up the real tags now; the order is synced when the scan ends
+            self._track_model.refresh([filename for filename, _ in results])
                 
-                # Album
-                album = self._metadata_cache[filename]["album"]
-                if album and album != "Unknown Album":
-                    albums.add(album)
-                    
-                # Artist
-                artist = self._metadata_cache[filename]["artist"]
-                if artist and artist != "Unknown Artist":
-                    artists.add(artist)
-            
-            # Update cache
-            self._stats_cache["total_duration_ms"] = total_ms
-            self._stats_cache["total_duration_formatted"] = self._format_duration(total_ms)
-            self._stats_cache["album_count"] = len(albums)
-            self._stats_cache["artist_count"] = len(artists)
-            self._stats_cache["is_valid"] = True
-            
-            # Emit signals with new values
-            self.totalDurationChanged.emit(self._stats_cache["total_duration_formatted"])
-            self.albumCountChanged.emit(self._stats_cache["album_count"])
-            self.artistCountChanged.emit(self._stats_cache["artist_count"])
-        
+            if self._library_stats.update_many(results):
+                self._publish_stats()
         except Exception as e:
-            print(f"Error calculating statistics: {e}")
-            # Set default values on error
-            self._stats_cache["total_duration_ms"] = 0
-            self._stats_cache["total_duration_formatted"] = "0:00:00"
-            self._stats_cache["album_count"] = 0
-            self._stats_cache["artist_count"] = 0
+            print(f"Error handling scan results: {e}")
+    
+    @Slot(int, int, int)
+    def _handle_scan_progress(self, generation, scanned, total):
+        """Forward scan progress to QML"""
+        if generation == self._scan_generation:
+            self.libraryScanProgress.emit(scanned, total)
+    
+    @Slot(int)
+    def _handle_scan_finished(self, generation):
+        """Mark statistics valid once the scan completes"""
+        if generation != self._scan_generation:
+            return
+            
+        self._scan_in_progress = False
+        self._stats_valid = True
+        self._refresh_track_model()
+        self.libraryScanFinished.emit()
+        self._start_loudness_analysis()
+        print(f"Library scan finished: {self._library_stats.album_count} albums, "
+              f"{self._library_stats.artist_count} artists, "
+              f"{self._format_duration(self._library_stats.total_duration_ms)}")
 
     def _format_duration(self, ms):
         """Format milliseconds to hours:minutes:seconds"""
@@ -861,55 +1937,91 @@ class MediaManager(QObject):
     @Slot(result=str)
     def get_total_duration(self):
         """Get the total duration of all media files as formatted string"""
-        if not self._stats_cache["is_valid"]:
+        if not self._stats_valid:
             self._calculate_all_stats()
-        return self._stats_cache["total_duration_formatted"]
+        return self._format_duration(self._library_stats.total_duration_ms)
 
     @Slot(result=int)
     def get_album_count(self):
         """Get the count of unique albums"""
-        if not self._stats_cache["is_valid"]:
+        if not self._stats_valid:
             self._calculate_all_stats()
-        return self._stats_cache["album_count"]
+        return self._library_stats.album_count
 
     @Slot(result=int)
     def get_artist_count(self):
         """Get the count of unique artists"""
-        if not self._stats_cache["is_valid"]:
+        if not self._stats_valid:
             self._calculate_all_stats()
-        return self._stats_cache["artist_count"]
+        return self._library_stats.artist_count
     
-    def _clean_for_sort(self, filename):
-        """Helper function to create consistent sort keys"""
-        return re.sub(r'[^\w\s]|_', '', filename.lower())
-
     @Slot(str, bool, result=list)
     def sort_media_files(self, sort_column, ascending=True):
         """Sort media files based on criteria"""
         try:
+            if sort_column in ("title", "album", "artist"):
+                # Orders are maintained by the sort index as the library changes
+                if self._media_files_dir != self.media_dir:
+                    self._load_media_files()
+                return self._sort_index.sorted_files(sort_column, ascending)
+                
             # Use cached files instead of calling get_media_files() again
             # This is the key change to prevent the infinite recursion
-            files = self._current_playlist if self._current_playlist else self.get_media_files(emit_signal=False)
-            
-            if sort_column == "title":
-                sorted_files = sorted(files, 
-                                key=lambda x: re.sub(r'[^\w\s]|_', '', 
-                                                    x.replace('.mp3', '').lower().strip()), 
-                                reverse=not ascending)
-            elif sort_column == "album":
-                sorted_files = sorted(files, 
-                                key=lambda x: re.sub(r'[^\w\s]|_', '', 
-                                                    self.get_album(x).lower().strip()), 
-                                reverse=not ascending)
-            elif sort_column == "artist":
-                sorted_files = sorted(files, 
-                                key=lambda x: re.sub(r'[^\w\s]|_', '', 
-                                                    self.get_band(x).lower().strip()), 
-                                reverse=not ascending)
-            else:
-                sorted_files = files
-                
-            return sorted_files
+            return self._queue.files() if len(self._queue) else self.get_media_files(emit_signal=False)
         except Exception as e:
             print(f"Error sorting media files: {e}")
-            return []  # Return empty list on error instead of calling get_media_files again
\ No newline at end of file
+            return []  # Return empty list on error instead of calling get_media_files again
+    
+    @Slot(str, bool)
+    def sort_track_model(self, sort_column, ascending=True):
+        """Reorder the track model; rows move in place instead of the list being rebuilt"""
+        self._track_model_sort = (sort_column, ascending)
+        self._refresh_track_model()
+    
+    def _refresh_track_model(self):
+        """Sync the track model with the library in the current model order"""
+        try:
+            self._track_model.sync(self.sort_media_files(*self._track_model_sort))
+        except Exception as e:
+            print(f"Error updating track model: {e}")
+    
+    def _track_row_data(self, filename):
+        """Everything a media list row displays, gathered in one call"""
+        self._cache_metadata(filename)
+        meta = self._track_table.get(filename) or self._fallback_metadata(filename)
+        minutes, seconds = divmod(meta["duration"], 60)
+        return {
+            "title": os.path.basename(filename).replace('.mp3', ''),
+            "artist": meta["artist"],
+            "album": meta["album"],
+            "duration": f"{minutes}:{seconds:02d}",
+            "art": self.get_album_art(filename)
+        }
+    
+    def _get_track_model(self):
+        return self._track_model
+    
+    track_model = Property(QObject, _get_track_model, constant=True)
+    
+    @Slot(str, result=list)
+    @Slot(str, int, result=list)
+    def search_media(self, query, limit=50):
+        """Files whose title, artist or album match every word of query, best first"""
+        try:
+            if self._media_files_dir != self.media_dir:
+                self._load_media_files()
+            return self._search_index.search(query, limit)
+        except Exception as e:
+            print(f"Error searching media: {e}")
+            return []
+    
+    @Slot(str, str, bool, result=int)
+    def get_sort_section_index(self, sort_column, prefix, ascending=True):
+        """Get the row where entries starting with prefix begin (for A-Z jumping)"""
+        try:
+            if sort_column not in ("title", "album", "artist"):
+                return 0
+            return self._sort_index.section_index(sort_column, prefix, ascending)
+        except Exception as e:
+            print(f"Error finding sort section: {e}")
+            return 0
@@ -0,0 +1,326 @@
+import os
+import struct
+
+
+# Bitrates in kbit/s indexed by [MPEG-1?][layer][index]; layer 1 = Layer I
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+# Sample rates indexed by the version bits (0 = MPEG-2.5, 2 = MPEG-2, 3 = MPEG-1)
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+_TEXT_FRAMES = {
+    "TIT2": "title", "TPE1": "artist", "TALB": "album",
+    "TT2": "title", "TP1": "artist", "TAL": "album",
+}
+
+_TEXT_ENCODINGS = ("latin-1", "utf-16", "utf-16-be", "utf-8")
+
+# How far past the tag to look for the first audio frame
+_SYNC_SEARCH_BYTES = 8192
+
+
+class ProbeError(Exception):
+    """The file uses a feature the probe does not handle; use a full parser"""
+
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+
+def _decode_text(data):
+    """Decode the first value of an ID3 text frame body"""
+    if not data:
+        return ""
+    encoding = data[0]
+    if encoding >= len(_TEXT_ENCODINGS):
+        raise ProbeError(f"unknown text encoding {encoding}")
+    text = data[1:].decode(_TEXT_ENCODINGS[encoding], errors="replace")
+    return text.split('\x00', 1)[0].strip()
+
+
+def _terminator_end(data, start, encoding):
+    """Index just past the null terminator of a string starting at start"""
+    if encoding in (1, 2):
+        position = start
+        while position + 1 < len(data):
+            if data[position] == 0 and data[position + 1] == 0:
+                return position + 2
+            position += 2
+        return -1
+    position = data.find(b'\x00', start)
+    return -1 if position < 0 else position + 1
+
+
+def _picture_header_length(body, version):
+    """Bytes in front of the image data of an APIC/PIC frame, and its MIME type"""
+    if len(body) < (5 if version == 2 else 4):
+        raise ProbeError("truncated picture frame")
+    encoding = body[0]
+    if version == 2:
+        # PIC: encoding, 3-char image format, picture type, description
+        image_format = body[1:4].decode('latin-1').upper()
+        mime = {"JPG": "image/jpeg", "PNG": "image/png"}.get(image_format, "")
+        end = _terminator_end(body, 5, encoding)
+    else:
+        # APIC: encoding, MIME type, picture type, description
+        mime_end = body.find(b'\x00', 1)
+        if mime_end < 0:
+            return -1, ""
+        mime = body[1:mime_end].decode('latin-1')
+        end = _terminator_end(body, mime_end + 2, encoding)
+    return end, mime.lower()
+
+
+def _read_id3v2(f, result):
+    """Parse an ID3v2 tag at the current position; return the offset where it ends"""
+    header = f.read(10)
+    if len(header) < 10 or header[:3] != b'ID3':
+        return 0
+
+    version = header[3]
+    flags = header[5]
+    tag_size = _syncsafe(header[6:10])
+    tag_end = 10 + tag_size + (10 if version == 4 and flags & 0x10 else 0)
+
+    if version not in (2, 3, 4):
+        raise ProbeError(f"unsupported ID3v2.{version}")
+    if flags & 0x80 and version < 4:
+        # Tag-wide unsynchronisation scrambles frame offsets
+        raise ProbeError("unsynchronised tag")
+
+    position = 10
+    if flags & 0x40 and version > 2:
+        ext = f.read(4)
+        if len(ext) < 4:
+            raise ProbeError("truncated extended header")
+        ext_size = _syncsafe(ext) if version == 4 else struct.unpack('>I', ext)[0] + 4
+        position += ext_size
+        f.seek(position)
+
+    header_size = 6 if version == 2 else 10
+    while position + header_size <= 10 + tag_size:
+        frame_header = f.read(header_size)
+        if len(frame_header) < header_size or frame_header[0] == 0:
+            break  # Padding
+
+        if version == 2:
+            frame_id = frame_header[:3].decode('latin-1', errors='replace')
+            size = int.from_bytes(frame_header[3:6], 'big')
+            frame_flags = 0
+        else:
+            frame_id = frame_header[:4].decode('latin-1', errors='replace')
+            size = _syncsafe(frame_header[4:8]) if version == 4 else struct.unpack('>I', frame_header[4:8])[0]
+            frame_flags = struct.unpack('>H', frame_header[8:10])[0]
+
+        body_start = position + header_size
+        position = body_start + size
+        if position > 10 + tag_size:
+            break
+
+        # Compressed, encrypted or unsynchronised frames need a real parser
+        if version == 4:
+            transformed = frame_flags & 0x000E
+            extra = (1 if frame_flags & 0x0040 else 0) + (4 if frame_flags & 0x0001 else 0)
+        elif version == 3:
+            transformed = frame_flags & 0x00C0
+            extra = 1 if frame_flags & 0x0020 else 0
+        else:
+            transformed = extra = 0
+
+        field = _TEXT_FRAMES.get(frame_id)
+        if field is not None:
+            if transformed:
+                raise ProbeError(f"transformed {frame_id} frame")
+            if field not in result:
+                body = f.read(size)
+                result[field] = _decode_text(body[extra:])
+            else:
+                f.seek(position)
+        elif frame_id in ("APIC", "PIC"):
+            # Only the picture header is read; the image itself is skipped
+            prefix = -1
+            if not transformed:
+                peek = f.read(min(size, 512))[extra:]
+                prefix, mime = _picture_header_length(peek, version)
+            if prefix <= 0:
+                # Transformed frames and descriptions running past the peek need a full parser
+                result["apic"] = None
+            elif result["apic"] is not None:
+                result["apic"].append({
+                    "offset": body_start + extra + prefix,
+                    "length": size - extra - prefix,
+                    "mime": mime
+                })
+            f.seek(position)
+        else:
+            f.seek(position)
+
+    return tag_end
+
+
+def _read_id3v1(trailer, result):
+    """Fill title/artist/album still missing from a 128-byte ID3v1 trailer"""
+    for field, start in (("title", 3), ("artist", 33), ("album", 63)):
+        text = trailer[start:start + 30].split(b'\x00', 1)[0].decode('latin-1').strip()
+        if text and field not in result:
+            result[field] = text
+
+
+def _parse_frame_header(header):
+    """Decode a 4-byte MPEG audio frame header, or None if it is not one"""
+    if header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+
+    version_bits = (header[1] >> 3) & 0x03
+    layer_bits = (header[1] >> 1) & 0x03
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version_bits == 3
+    layer = 4 - layer_bits
+    bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version_bits][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    mono = (header[3] >> 6) == 3
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if layer == 2 or mpeg1 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "bitrate": bitrate,
+        "sample_rate": sample_rate,
+        "samples": samples,
+        "length": length,
+        "mono": mono
+    }
+
+
+def _find_first_frame(data):
+    """Offset and header of the first plausible audio frame in data"""
+    position = data.find(b'\xff')
+    while 0 <= position <= len(data) - 4:
+        frame = _parse_frame_header(data[position:position + 4])
+        if frame is not None:
+            # Require the next header to line up when it is within the buffer
+            following = position + frame["length"]
+            if following + 4 > len(data) or _parse_frame_header(data[following:following + 4]) is not None:
+                return position, frame
+        position = data.find(b'\xff', position + 1)
+    return -1, None
+
+
+def _vbr_header(data, frame):
+    """Read a Xing/Info or VBRI header from the first frame: (frame count, encoder delay + padding)"""
+    if frame["mpeg1"]:
+        side_info = 17 if frame["mono"] else 32
+    else:
+        side_info = 9 if frame["mono"] else 17
+
+    xing = 4 + side_info
+    tag = data[xing:xing + 4]
+    if tag in (b'Xing', b'Info'):
+        flags = struct.unpack('>I', data[xing + 4:xing + 8])[0]
+        position = xing + 8
+        frames = None
+        if flags & 0x01:
+            frames = struct.unpack('>I', data[position:position + 4])[0]
+            position += 4
+        if flags & 0x02:
+            position += 4
+        if flags & 0x04:
+            position += 100
+        if flags & 0x08:
+            position += 4
+
+        # LAME extension: encoder delay and padding, 12 bits each
+        trim = 0
+        if data[position:position + 4] == b'LAME' and len(data) >= position + 24:
+            packed = int.from_bytes(data[position + 21:position + 24], 'big')
+            trim = (packed >> 12) + (packed & 0xFFF)
+        return frames, trim, tag == b'Xing'
+
+    if data[36:40] == b'VBRI':
+        frames = struct.unpack('>I', data[50:54])[0]
+        return frames, 0, True
+
+    return None, 0, False
+
+
+def probe_mp3(path):
+    """Read tags, duration and embedded picture offsets with a few small reads
+
+    Returns a dict with title/artist/album (only those present), duration in
+    seconds, bitrate, sample_rate, vbr, audio_offset and apic, a list of
+    {offset, length, mime} for every embedded picture, or None when a picture
+    frame could not be located. Raises ProbeError for
+    files that need a full parser and OSError for unreadable files.
+    """
+    result = {"apic": []}
+    file_size = os.path.getsize(path)
+
+    with open(path, 'rb') as f:
+        tag_end = _read_id3v2(f, result)
+
+        f.seek(tag_end)
+        data = f.read(_SYNC_SEARCH_BYTES)
+        offset, frame = _find_first_frame(data)
+        if frame is None:
+            raise ProbeError("no MPEG audio frame found")
+
+        audio_offset = tag_end + offset
+        first_frame = data[offset:offset + max(frame["length"], 256)]
+        if len(first_frame) < 256:
+            f.seek(audio_offset)
+            first_frame = f.read(max(frame["length"], 256))
+
+        frames, trim, vbr = _vbr_header(first_frame, frame)
+
+        audio_end = file_size
+        if file_size - audio_offset > 128:
+            f.seek(file_size - 128)
+            trailer = f.read(128)
+            if trailer[:3] == b'TAG':
+                audio_end -= 128
+                # ID3v2 frames take precedence; the trailer fills in the rest
+                _read_id3v1(trailer, result)
+
+    if frames:
+        samples = frames * frame["samples"] - trim
+        duration = max(samples, 0) / frame["sample_rate"]
+        bitrate = int((audio_end - audio_offset) * 8 / duration) if duration else frame["bitrate"]
+    else:
+        # Constant bitrate: the stream length gives the duration directly
+        bitrate = frame["bitrate"]
+        duration = (audio_end - audio_offset) * 8 / bitrate
+
+    result.update({
+        "duration": duration,
+        "bitrate": bitrate,
+        "sample_rate": frame["sample_rate"],
+        "vbr": vbr,
+        "audio_offset": audio_offset
+    })
+    return result
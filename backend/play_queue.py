@@ -0,0 +1,268 @@
+from collections import deque
+import random
+
+
+class PlayQueue:
+    """Playback order over the library with O(1) navigation
+
+    Tracks keep their library order in a list plus a track to position map.
+    Shuffle order is a Fisher-Yates permutation drawn one slot at a time as
+    playback reaches it, stored sparsely with its inverse so a track's slot
+    can be found without a scan. Tracks played are remembered in a bounded
+    history that previous() follows in shuffle mode, and enqueue() puts
+    tracks ahead of the regular order. Those play as a detour that leaves
+    the cursor alone, so the regular order resumes where it left off.
+    """
+
+    def __init__(self, history_size=100):
+        self._tracks = []
+        self._positions = {}      # Track to index in _tracks
+        self._cursor = -1         # Sequence position of the current track
+        self._shuffle = False
+        self._slots = {}          # Shuffle slot to track index; missing slots map to themselves
+        self._slot_of = {}        # Track index to shuffle slot; the inverse of _slots
+        self._drawn = 0           # Slots below this are fixed for the current cycle
+        self._wrap_pick = None    # Track index opening the next shuffle cycle, once peeked
+        self._history = deque(maxlen=history_size)
+        self._up_next = deque()
+        self._detour = None       # Enqueued track playing instead of the one at the cursor
+        self._random = random.Random()
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def __contains__(self, track):
+        return track in self._positions
+
+    @property
+    def shuffle(self):
+        return self._shuffle
+
+    @property
+    def position(self):
+        """Sequence position of the current track, -1 if nothing is selected"""
+        return self._cursor
+
+    def set_tracks(self, tracks, current=None):
+        """Replace the track list, keeping the current track where possible
+
+        In shuffle mode the part of the cycle already reached is kept, so
+        added tracks land among the ones not yet played.
+        """
+        if current is None or current == self._detour:
+            current = self._regular()
+        reached = []
+        if self._shuffle:
+            reached = [self._tracks[self._index_at(slot)] for slot in range(self._drawn)]
+        old_cursor = self._cursor
+
+        self._tracks = list(tracks)
+        self._positions = {track: index for index, track in enumerate(self._tracks)}
+        self._up_next = deque(t for t in self._up_next if t in self._positions)
+        if self._detour not in self._positions:
+            self._detour = None
+        self._reset_permutation()
+
+        if not self._tracks:
+            self._cursor = -1
+            self._detour = None
+            return
+
+        if not self._shuffle:
+            index = self._positions.get(current)
+            self._cursor = index if index is not None else min(max(old_cursor, 0), len(self._tracks) - 1)
+            return
+
+        # Re-draw the reached tracks that still exist, in their old order
+        cursor = -1
+        for slot, track in enumerate(reached):
+            index = self._positions.get(track)
+            if index is None:
+                continue
+            self._swap(self._drawn, self._slot_of.get(index, index))
+            self._drawn += 1
+            if slot <= old_cursor:
+                cursor = self._drawn - 1
+        if self._drawn == 0:
+            self._draw(0)
+        self._cursor = max(cursor, 0)
+
+    def set_shuffle(self, enabled):
+        """Switch order while staying on the current track"""
+        enabled = bool(enabled)
+        if enabled == self._shuffle:
+            return
+        index = self._index_at(self._cursor) if self._cursor >= 0 else None
+        self._shuffle = enabled
+        if not self._tracks:
+            return
+
+        if enabled:
+            self._reset_permutation(first=index)
+            self._cursor = 0
+        else:
+            self._reset_permutation()
+            self._cursor = index if index is not None else 0
+
+    def current(self):
+        """The current track, or "" when the queue is empty"""
+        if self._detour is not None:
+            return self._detour
+        return self._regular()
+
+    def _regular(self):
+        """The track at the cursor, ignoring a detour"""
+        if not 0 <= self._cursor < len(self._tracks):
+            return ""
+        return self._tracks[self._index_at(self._cursor)]
+
+    def peek_next(self):
+        """The track next() will return, without moving"""
+        if self._up_next:
+            return self._up_next[0]
+        if not self._tracks:
+            return ""
+
+        following = self._cursor + 1
+        if not self._shuffle:
+            return self._tracks[following % len(self._tracks)]
+
+        if following < len(self._tracks):
+            self._draw(following)
+            return self._tracks[self._index_at(following)]
+
+        if self._wrap_pick is None:
+            self._wrap_pick = self._pick_other(self._index_at(self._cursor))
+        return self._tracks[self._wrap_pick]
+
+    def next(self):
+        """Advance to and return the next track"""
+        if not self._tracks:
+            return ""
+
+        if self.current():
+            self._history.append(self.current())
+
+        if self._up_next:
+            # The cursor stays put, so the regular order continues after the detour
+            self._detour = self._up_next.popleft()
+            return self._detour
+        self._detour = None
+
+        following = self._cursor + 1
+        if not self._shuffle:
+            self._cursor = following % len(self._tracks)
+        elif following < len(self._tracks):
+            self._draw(following)
+            self._cursor = following
+        else:
+            # Cycle finished: continue with a fresh permutation
+            first = self._wrap_pick
+            if first is None:
+                first = self._pick_other(self._index_at(self._cursor))
+            self._reset_permutation(first=first)
+            self._cursor = 0
+        return self.current()
+
+    def previous(self):
+        """Step back and return the track; shuffle mode retraces the history"""
+        if not self._tracks:
+            return ""
+
+        if self._detour is not None:
+            # Back from a detour to the track it interrupted
+            self._detour = None
+            if self._history and self._history[-1] == self.current():
+                self._history.pop()
+            return self.current()
+
+        if self._shuffle:
+            while self._history:
+                track = self._history.pop()
+                if track in self._positions:
+                    self.jump(track, record=False)
+                    return self.current()
+            self._cursor = max(self._cursor - 1, 0)
+        else:
+            self._cursor = (self._cursor - 1) % len(self._tracks)
+        return self.current()
+
+    def jump(self, track, record=True):
+        """Make track current; False if it is not in the queue"""
+        index = self._positions.get(track)
+        if index is None:
+            return False
+        if self._cursor >= 0 and self.current() == track:
+            return True
+
+        if record and self.current():
+            self._history.append(self.current())
+        self._detour = None
+
+        if not self._shuffle:
+            self._cursor = index
+            return True
+
+        slot = self._slot_of.get(index, index)
+        if slot >= self._drawn:
+            # Not reached yet in this cycle: draw it into the next open slot
+            self._swap(self._drawn, slot)
+            slot = self._drawn
+            self._drawn += 1
+        self._cursor = slot
+        self._wrap_pick = None
+        return True
+
+    def enqueue(self, track):
+        """Play track after the current one, ahead of the regular order"""
+        if track not in self._positions:
+            return False
+        self._up_next.append(track)
+        return True
+
+    def files(self):
+        """Tracks in playback order; in shuffle mode this fixes the whole cycle"""
+        if not self._shuffle:
+            return list(self._tracks)
+        if self._tracks:
+            self._draw(len(self._tracks) - 1)
+        return [self._tracks[self._index_at(slot)] for slot in range(len(self._tracks))]
+
+    def _index_at(self, slot):
+        """Track index at a sequence position"""
+        if not self._shuffle:
+            return slot
+        return self._slots.get(slot, slot)
+
+    def _swap(self, a, b):
+        """Swap two slots of the sparse permutation"""
+        index_a = self._slots.get(a, a)
+        index_b = self._slots.get(b, b)
+        self._slots[a] = index_b
+        self._slots[b] = index_a
+        self._slot_of[index_b] = a
+        self._slot_of[index_a] = b
+
+    def _draw(self, slot):
+        """Fix permutation slots up to slot with Fisher-Yates steps"""
+        while self._drawn <= slot:
+            self._swap(self._drawn, self._random.randrange(self._drawn, len(self._tracks)))
+            self._drawn += 1
+
+    def _reset_permutation(self, first=None):
+        """Start a new shuffle cycle, optionally opening with a given track index"""
+        self._slots = {}
+        self._slot_of = {}
+        self._drawn = 0
+        self._wrap_pick = None
+        if first is not None and self._shuffle:
+            self._swap(0, first)
+            self._drawn = 1
+
+    def _pick_other(self, index):
+        """A random track index other than index (unless it is the only one)"""
+        count = len(self._tracks)
+        if count < 2:
+            return 0
+        pick = self._random.randrange(count - 1)
+        return pick + 1 if pick >= index else pick
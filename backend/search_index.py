@@ -0,0 +1,180 @@
+import bisect
+import heapq
+import os
+import unicodedata
+
+from backend.sort_index import normalize_sort_key
+
+
+def normalize_search_text(text):
+    """Fold case, accents and punctuation so queries match loosely typed text"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(normalize_sort_key(text).split())
+
+
+class SearchIndex:
+    """Incremental search over track titles, artists and albums
+
+    Whole words are kept in a sorted vocabulary so a query term matches every
+    word it prefixes with one binary search. Terms of three or more characters
+    also match inside words through a trigram index over the vocabulary. Each
+    word's postings carry the best field weight per track, so matches are
+    scored from the index without looking at track texts. Tracks are updated
+    and removed individually; queries never rebuild anything.
+    """
+
+    FIELDS = ("title", "artist", "album")
+    FIELD_WEIGHTS = {"title": 3, "artist": 2, "album": 1}
+
+    # Match quality, multiplied by the field weight
+    EXACT, PREFIX, SUBSTRING = 3, 2, 1
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._docs = {}       # Filename to {field: normalized text}
+        self._postings = {}   # Word to {filename: best field weight of the word}
+        self._vocabulary = []  # Sorted words, for prefix ranges
+        self._trigrams = {}   # Trigram to set of words containing it
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, filename):
+        return filename in self._docs
+
+    def _make_doc(self, filename, metadata):
+        """Normalized field texts for one track"""
+        title = metadata.get("title") or ""
+        basename = os.path.basename(filename).replace('.mp3', '')
+        if basename.lower() != title.lower():
+            title = f"{title} {basename}"
+        return {
+            "title": normalize_search_text(title),
+            "artist": normalize_search_text(metadata.get("artist", "")),
+            "album": normalize_search_text(metadata.get("album", ""))
+        }
+
+    def _word_weights(self, doc):
+        """Each word of a document with the weight of the best field it is in"""
+        weights = {}
+        for field in self.FIELDS:
+            weight = self.FIELD_WEIGHTS[field]
+            for word in doc[field].split():
+                if weight > weights.get(word, 0):
+                    weights[word] = weight
+        return weights
+
+    @staticmethod
+    def _trigrams_of(text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def update(self, filename, metadata):
+        """Add a track or re-index it after its tags changed"""
+        doc = self._make_doc(filename, metadata)
+        if self._docs.get(filename) == doc:
+            return
+
+        self.remove(filename)
+        self._docs[filename] = doc
+
+        for word, weight in self._word_weights(doc).items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._vocabulary, word)
+                for trigram in self._trigrams_of(word):
+                    self._trigrams.setdefault(trigram, set()).add(word)
+            postings[filename] = weight
+
+    def update_many(self, tracks):
+        """Apply update() to (filename, metadata) pairs"""
+        for filename, metadata in tracks:
+            self.update(filename, metadata)
+
+    def remove(self, filename):
+        """Drop a track from the index"""
+        doc = self._docs.pop(filename, None)
+        if doc is None:
+            return
+
+        for word in self._word_weights(doc):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.pop(filename, None)
+            if postings:
+                continue
+
+            del self._postings[word]
+            position = bisect.bisect_left(self._vocabulary, word)
+            if position < len(self._vocabulary) and self._vocabulary[position] == word:
+                del self._vocabulary[position]
+            for trigram in self._trigrams_of(word):
+                words = self._trigrams.get(trigram)
+                if words is not None:
+                    words.discard(word)
+                    if not words:
+                        del self._trigrams[trigram]
+
+    def remove_many(self, filenames):
+        for filename in filenames:
+            self.remove(filename)
+
+    def _prefix_words(self, term):
+        """Vocabulary words starting with term"""
+        start = bisect.bisect_left(self._vocabulary, term)
+        end = bisect.bisect_left(self._vocabulary, term + '\uffff')
+        return self._vocabulary[start:end]
+
+    def _substring_words(self, term):
+        """Vocabulary words containing term somewhere after their start"""
+        postings = [self._trigrams.get(trigram) for trigram in self._trigrams_of(term)]
+        if not postings or any(p is None for p in postings):
+            return []
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for p in postings[1:]:
+            candidates &= p
+            if not candidates:
+                break
+        # Trigram candidates can be false positives
+        return [word for word in candidates if term in word and not word.startswith(term)]
+
+    def _term_scores(self, term):
+        """Filename to best weighted match of one query term"""
+        matches = [(word, self.EXACT if word == term else self.PREFIX) for word in self._prefix_words(term)]
+        if len(term) >= 3:
+            matches.extend((word, self.SUBSTRING) for word in self._substring_words(term))
+
+        scores = {}
+        for word, quality in matches:
+            for filename, weight in self._postings[word].items():
+                score = quality * weight
+                if score > scores.get(filename, 0):
+                    scores[filename] = score
+        return scores
+
+    def search(self, query, limit=50):
+        """Return filenames matching every term of query, best matches first"""
+        terms = normalize_search_text(query).split()
+        if not terms:
+            return []
+
+        totals = None
+        # Rarest-looking (longest) terms first narrows the candidate set fastest
+        for term in sorted(terms, key=len, reverse=True):
+            scores = self._term_scores(term)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {filename: total + scores[filename]
+                          for filename, total in totals.items() if filename in scores}
+            if not totals:
+                return []
+
+        best = heapq.nsmallest(limit, totals.items(),
+                               key=lambda item: (-item[1], self._docs[item[0]]["title"], item[0]))
+        return [filename for filename, _ in best]
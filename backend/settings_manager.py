@@ -21,6 +21,7 @@ class SettingsManager(QObject):
     obdFastModeChanged = Signal(bool)
     obdParametersChanged = Signal()
     mediaFolderChanged = Signal(str)
+    scanSubfoldersChanged = Signal(bool)
     showBackgroundOverlayChanged = Signal(bool)
     directoryHistoryChanged = Signal()
     homeOBDParametersChanged = Signal()
@@ -48,6 +49,7 @@ class SettingsManager(QObject):
             "obdFastMode": True,
             "showBackgroundOverlay": True,
             "bottomBarOrientation": "bottom",
+            "scanSubfolders": False,
             "fuelTankCapacity": 15.0,  # Add fuel tank capacity setting in gallons
             "obdParameters": {
                 "COOLANT_TEMP": True,
@@ -102,6 +104,7 @@ class SettingsManager(QObject):
         self._obd_bluetooth_port = self._settings.get("obdBluetoothPort", self._default_settings["obdBluetoothPort"])
         self._obd_fast_mode = self._settings.get("obdFastMode", self._default_settings["obdFastMode"])
         self._media_folder = self._settings.get("mediaFolder", os.path.join(self.backend_dir, 'media'))
+        self._scan_subfolders = self._settings.get("scanSubfolders", self._default_settings["scanSubfolders"])
         self._show_background_overlay = self._settings.get("showBackgroundOverlay", self._default_settings["showBackgroundOverlay"])
         self._fuel_tank_capacity = self._settings.get("fuelTankCapacity", self._default_settings["fuelTankCapacity"])
         self._home_obd_parameters = self._settings.get("homeOBDParameters", self._default_settings["homeOBDParameters"])
@@ -203,6 +206,10 @@ class SettingsManager(QObject):
     def mediaFolder(self):
         return self._media_folder
     
+    @Property(bool, notify=scanSubfoldersChanged)
+    def scanSubfolders(self):
+        return self._scan_subfolders
+    
     @Property(bool, notify=showBackgroundOverlayChanged)
     def showBackgroundOverlay(self):
         return self._show_background_overlay
@@ -357,6 +364,12 @@ class SettingsManager(QObject):
         self._media_folder = folder_path
         self.update_setting("mediaFolder", folder_path, self.mediaFolderChanged)
         
+    @Slot(bool)
+    def save_scan_subfolders(self, enabled):
+        print(f"Saving scan subfolders setting: {enabled}")
+        self._scan_subfolders = enabled
+        self.update_setting("scanSubfolders", enabled, self.scanSubfoldersChanged)
+        
     @Slot(bool)
     def save_show_background_overlay(self, show):
         print(f"Saving show background overlay setting: {show}")
@@ -541,6 +554,9 @@ class SettingsManager(QObject):
         self._show_background_overlay = self._default_settings["showBackgroundOverlay"]
         self.showBackgroundOverlayChanged.emit(self._show_background_overlay)
         
+        self._scan_subfolders = self._default_settings["scanSubfolders"]
+        self.scanSubfoldersChanged.emit(self._scan_subfolders)
+        
         self._fuel_tank_capacity = self._default_settings["fuelTankCapacity"]
         self.fuelTankCapacityChanged.emit(self._fuel_tank_capacity)
             
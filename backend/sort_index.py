@@ -0,0 +1,121 @@
+import bisect
+import os
+import re
+
+_SORT_STRIP = re.compile(r'[^\w\s]|_')
+
+
+def normalize_sort_key(text):
+    """Lowercase text and strip punctuation so sorting ignores it"""
+    return _SORT_STRIP.sub('', text.lower().strip())
+
+
+class SortIndex:
+    """Keeps the library pre-sorted by file, title, artist and album
+
+    Sort keys are normalized once when a track is indexed. Each column keeps a
+    sorted list of (key, filename) pairs that is updated in place as tracks are
+    added, removed or retagged, so reading an order is a plain list copy.
+    """
+
+    COLUMNS = ("file", "title", "artist", "album")
+
+    # Above this many changes at once a full re-sort beats repeated insort
+    _BULK_THRESHOLD = 64
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._keys = {}  # Filename to {column: key}
+        self._orders = {column: [] for column in self.COLUMNS}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, filename):
+        return filename in self._keys
+
+    def _make_keys(self, filename, metadata):
+        """Compute the normalized sort keys for one track"""
+        title = os.path.basename(filename).replace('.mp3', '')
+        return {
+            "file": normalize_sort_key(filename),
+            "title": normalize_sort_key(title),
+            "artist": normalize_sort_key(metadata["artist"]),
+            "album": normalize_sort_key(metadata["album"])
+        }
+
+    def update_many(self, tracks):
+        """Add or re-key (filename, metadata) pairs"""
+        tracks = list(tracks)
+        if not tracks:
+            return
+
+        if len(tracks) > self._BULK_THRESHOLD:
+            for filename, metadata in tracks:
+                self._keys[filename] = self._make_keys(filename, metadata)
+            self._rebuild_orders()
+            return
+
+        for filename, metadata in tracks:
+            keys = self._make_keys(filename, metadata)
+            old_keys = self._keys.get(filename)
+            if old_keys == keys:
+                continue
+
+            for column in self.COLUMNS:
+                order = self._orders[column]
+                if old_keys is not None:
+                    self._remove_entry(order, (old_keys[column], filename))
+                bisect.insort(order, (keys[column], filename))
+            self._keys[filename] = keys
+
+    def update(self, filename, metadata):
+        """Add or re-key a single track"""
+        self.update_many([(filename, metadata)])
+
+    def remove_many(self, filenames):
+        """Drop tracks from every order"""
+        filenames = [f for f in filenames if f in self._keys]
+        if len(filenames) > self._BULK_THRESHOLD:
+            for filename in filenames:
+                del self._keys[filename]
+            self._rebuild_orders()
+            return
+
+        for filename in filenames:
+            keys = self._keys.pop(filename)
+            for column in self.COLUMNS:
+                self._remove_entry(self._orders[column], (keys[column], filename))
+
+    def _remove_entry(self, order, entry):
+        """Remove an entry from a sorted list with a binary search"""
+        position = bisect.bisect_left(order, entry)
+        if position < len(order) and order[position] == entry:
+            del order[position]
+
+    def _rebuild_orders(self):
+        """Re-sort every column from the stored keys"""
+        for column in self.COLUMNS:
+            self._orders[column] = sorted((keys[column], filename) for filename, keys in self._keys.items())
+
+    def sorted_files(self, column, ascending=True):
+        """Return filenames ordered by column"""
+        order = self._orders[column]
+        files = [filename for _, filename in order]
+        if not ascending:
+            files.reverse()
+        return files
+
+    def section_index(self, column, prefix, ascending=True):
+        """Return the row where entries starting with prefix begin in the given order"""
+        order = self._orders[column]
+        key = normalize_sort_key(prefix)
+        position = bisect.bisect_left(order, (key,))
+        if ascending:
+            return position
+
+        # In a descending list the section starts after everything sorting above it
+        end = bisect.bisect_left(order, (key + '\uffff',))
+        return len(order) - end
@@ -0,0 +1,158 @@
+from PySide6.QtCore import QObject, Signal
+import threading
+import time
+
+from backend.audio_processor import NUMPY_AVAILABLE, RingBuffer, SAMPLE_RATE, CHANNELS
+
+if NUMPY_AVAILABLE:
+    import numpy as np
+
+FFT_SIZE = 2048         # About 46 ms of audio, 21.5 Hz per bin at 44.1 kHz
+FLOOR_DB = -70.0        # Levels are scaled from this to 0 dB full scale
+FALL_PER_SECOND = 1.5   # Bars drop from full to empty in about 0.7 s
+
+
+def log_band_centers(count, low=20.0, high=20000.0):
+    """Centre frequencies of count log-spaced bands"""
+    return list(np.geomspace(low, high, count))
+
+
+def band_weights(centers, sample_rate=SAMPLE_RATE, fft_size=FFT_SIZE):
+    """Matrix summing rfft bin powers into bands around the given centres
+
+    Band edges lie halfway (geometrically) between neighbouring centres.
+    Bands narrower than a bin still get the bin they fall into, so low
+    bands of a fine split may share one.
+    """
+    centers = np.asarray(centers, dtype=np.float64)
+    ratios = np.sqrt(centers[1:] / centers[:-1]) if len(centers) > 1 else np.array([2 ** 0.5])
+    edges = np.concatenate(([centers[0] / ratios[0]], centers[:-1] * ratios, [centers[-1] * ratios[-1]]))
+
+    bins = fft_size // 2 + 1
+    bin_hz = sample_rate / fft_size
+    weights = np.zeros((len(centers), bins))
+    for band in range(len(centers)):
+        low = min(int(edges[band] / bin_hz), bins - 1)
+        high = min(max(int(np.ceil(edges[band + 1] / bin_hz)), low + 1), bins)
+        weights[band, low:high] = 1.0
+    return weights
+
+
+class SpectrumAnalyzer(QObject):
+    """Band levels of the playing audio for the media room display
+
+    Audio arrives from the shared AudioTap into a ring buffer. A worker
+    thread takes the newest FFT_SIZE frames at a fixed rate, applies a Hann
+    window and an rfft, and sums bin powers into bands. Levels between
+    0 and 1 are emitted in one spectrumChanged signal per frame. When a
+    frame takes longer than the CPU budget allows, the rate drops instead.
+    """
+
+    # Emitted from the worker thread; band levels from 0 to 1, low to high
+    spectrumChanged = Signal(list)
+
+    def __init__(self, tap, centers=None, rate=25, cpu_budget=0.05):
+        super().__init__()
+        self._tap = tap
+        self._interval = 1.0 / rate
+        self._cpu_budget = cpu_budget    # Fraction of one core the worker may use
+        self._ring = RingBuffer(FFT_SIZE * 2, CHANNELS)
+        self._window = np.hanning(FFT_SIZE).astype(np.float32)
+        # Power of a full scale sine after the window, so it reads as 0 dB
+        self._reference = (self._window.sum() / 2) ** 2
+        self._last_write = 0.0
+        self.set_bands(centers or log_band_centers(32))
+
+        self._active = False
+        self._stopped = False
+        self._wake = threading.Event()
+
+        # Frame timing, written by the worker thread
+        self._frames = 0
+        self._average_ms = 0.0
+        self._period_ms = self._interval * 1000
+
+        thread = threading.Thread(target=self._run, name="spectrum")
+        thread.daemon = True
+        thread.start()
+
+    def set_bands(self, centers):
+        """Switch to bands around the given centre frequencies"""
+        # Replaced as one tuple so the worker never pairs weights with stale levels
+        self._bands = (band_weights(centers), np.zeros(len(centers)))
+
+    def set_active(self, active):
+        """Analyse only while the display is shown"""
+        active = bool(active)
+        if active == self._active:
+            return
+        self._active = active
+        if active:
+            self._ring.clear()
+            self._tap.subscribe(self._handle_samples)
+            self._wake.set()
+        else:
+            self._tap.unsubscribe(self._handle_samples)
+            self._wake.clear()
+
+    def shutdown(self):
+        self.set_active(False)
+        self._stopped = True
+        self._wake.set()
+
+    def stats(self):
+        return {
+            "active": self._active,
+            "frames": self._frames,
+            "average_ms": self._average_ms,
+            "period_ms": self._period_ms,
+            "load": self._average_ms / self._period_ms if self._period_ms else 0.0
+        }
+
+    def _handle_samples(self, samples):
+        self._ring.write(samples)
+        self._last_write = time.monotonic()
+
+    def _levels(self, frame, weights):
+        """Band levels from 0 to 1 of one block of frames"""
+        mono = frame.mean(axis=1) * self._window
+        power = np.square(np.abs(np.fft.rfft(mono))) / self._reference
+        db = 10 * np.log10(np.maximum(weights @ power, 1e-12))
+        return np.clip((db - FLOOR_DB) / -FLOOR_DB, 0.0, 1.0)
+
+    def _run(self):
+        """Worker thread: one analysis frame per period while active"""
+        frame = np.zeros((FFT_SIZE, CHANNELS), dtype=np.float32)
+        last_frame = time.monotonic()
+        while True:
+            self._wake.wait()
+            if self._stopped:
+                return
+
+            started = time.monotonic()
+            weights, levels = self._bands
+            try:
+                # Paused or stalled playback decays to silence instead of freezing the bars
+                fresh = started - self._last_write < 0.25
+                if fresh and self._ring.latest(frame) == FFT_SIZE:
+                    target = self._levels(frame, weights)
+                else:
+                    target = np.zeros(len(levels))
+
+                # Bars jump up at once and fall back gradually
+                fall = FALL_PER_SECOND * (started - last_frame)
+                updated = np.maximum(target, levels - fall)
+                if updated.any() or levels.any():
+                    levels[:] = updated
+                    self.spectrumChanged.emit([round(float(level), 3) for level in levels])
+            except Exception as e:
+                print(f"Error analysing spectrum: {e}")
+            last_frame = started
+
+            elapsed = time.monotonic() - started
+            self._frames += 1
+            self._average_ms += (elapsed * 1000 - self._average_ms) / min(self._frames, 50)
+            # Stretch the period when frames get expensive, to stay within the CPU budget
+            period = max(self._interval, self._average_ms / 1000 / self._cpu_budget)
+            self._period_ms = period * 1000
+            time.sleep(max(period - elapsed, 0.0))
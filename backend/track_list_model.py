@@ -0,0 +1,224 @@
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt, Signal, Property
+import bisect
+
+from backend.lru_cache import LRUCache
+
+
+class TrackListModel(QAbstractListModel):
+    """List model of the media library for QML ListViews
+
+    Rows are filenames; everything else is fetched through row_data(filename)
+    the first time a view asks for a row, so only visible rows are ever
+    resolved. Changes are applied with sync(), which turns the difference
+    between the old and new order into row removals, moves and insertions
+    instead of resetting the whole model.
+    """
+
+    FileRole = Qt.UserRole + 1
+    TitleRole = Qt.UserRole + 2
+    ArtistRole = Qt.UserRole + 3
+    AlbumRole = Qt.UserRole + 4
+    DurationRole = Qt.UserRole + 5
+    ArtRole = Qt.UserRole + 6
+
+    _ROLE_KEYS = {
+        TitleRole: "title",
+        ArtistRole: "artist",
+        AlbumRole: "album",
+        DurationRole: "duration",
+        ArtRole: "art"
+    }
+
+    # Above this many displaced rows one layout change is cheaper than row moves
+    _MAX_MOVES = 32
+
+    countChanged = Signal()
+
+    def __init__(self, row_data, parent=None):
+        super().__init__(parent)
+        self._row_data = row_data  # Callable(filename) -> dict with the _ROLE_KEYS values
+        self._files = []
+        self._rows = None  # Filename to row, rebuilt on demand after structural changes
+        self._row_cache = LRUCache(max_entries=512)
+
+    def roleNames(self):
+        return {
+            self.FileRole: b"file",
+            self.TitleRole: b"title",
+            self.ArtistRole: b"artist",
+            self.AlbumRole: b"album",
+            self.DurationRole: b"duration",
+            self.ArtRole: b"art"
+        }
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._files)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._files):
+            return None
+
+        filename = self._files[index.row()]
+        if role in (self.FileRole, Qt.DisplayRole):
+            return filename
+
+        key = self._ROLE_KEYS.get(role)
+        if key is None:
+            return None
+
+        row = self._row_cache.get(filename)
+        if row is None:
+            try:
+                row = self._row_data(filename)
+            except Exception as e:
+                print(f"Error loading row data for {filename}: {e}")
+                return None
+            self._row_cache.put(filename, row)
+        return row.get(key)
+
+    def _get_count(self):
+        return len(self._files)
+
+    count = Property(int, _get_count, notify=countChanged)
+
+    def _row_index(self):
+        if self._rows is None:
+            self._rows = {filename: row for row, filename in enumerate(self._files)}
+        return self._rows
+
+    def reset(self, files):
+        """Replace every row, e.g. after switching media folders"""
+        self.beginResetModel()
+        self._files = list(files)
+        self._rows = None
+        self._row_cache.clear()
+        self.endResetModel()
+        self.countChanged.emit()
+
+    def sync(self, files):
+        """Bring the rows in line with files using fine-grained notifications"""
+        files = list(files)
+        if files == self._files:
+            return
+
+        old_count = len(self._files)
+        target = set(files)
+
+        # Removals, from the end so earlier rows keep their positions
+        rows = [row for row, filename in enumerate(self._files) if filename not in target]
+        for first, last in reversed(self._runs(rows)):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for filename in self._files[first:last + 1]:
+                self._row_cache.pop(filename)
+            del self._files[first:last + 1]
+            self.endRemoveRows()
+
+        # Reorder the surviving rows to match their relative order in files
+        present = set(self._files)
+        survivors = [filename for filename in files if filename in present]
+        if survivors != self._files:
+            self._reorder(survivors)
+
+        # Insertions, from the start so each run lands at its final row
+        rows = [row for row, filename in enumerate(files) if filename not in present]
+        for first, last in self._runs(rows):
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._files[first:first] = files[first:last + 1]
+            self.endInsertRows()
+
+        self._rows = None
+        if len(self._files) != old_count:
+            self.countChanged.emit()
+
+    def refresh(self, filenames):
+        """Drop cached row data and tell views that these rows changed"""
+        rows = self._row_index()
+        changed = []
+        for filename in filenames:
+            self._row_cache.pop(filename)
+            row = rows.get(filename)
+            if row is not None:
+                changed.append(row)
+
+        for first, last in self._runs(sorted(changed)):
+            self.dataChanged.emit(self.index(first), self.index(last), list(self._ROLE_KEYS))
+
+    def _reorder(self, survivors):
+        """Move rows into the order of survivors, which holds the same files"""
+        moves = self._plan_moves(self._files, survivors, self._MAX_MOVES)
+        if moves is None:
+            self.layoutAboutToBeChanged.emit()
+            old_files = self._files
+            new_rows = {filename: row for row, filename in enumerate(survivors)}
+            persistent = self.persistentIndexList()
+            self._files = survivors
+            self.changePersistentIndexList(
+                persistent, [self.index(new_rows[old_files[index.row()]]) for index in persistent])
+            self.layoutChanged.emit()
+            return
+
+        for source, destination in moves:
+            self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), destination)
+            filename = self._files.pop(source)
+            self._files.insert(destination - 1 if source < destination else destination, filename)
+            self.endMoveRows()
+
+    @staticmethod
+    def _plan_moves(current, target, limit):
+        """Single-row moves turning current into target, or None if more than limit are needed
+
+        Rows on a longest increasing run of old positions stay put; every other
+        row is moved to just after its predecessor in target. Moves use Qt's
+        beginMoveRows convention, where the destination is counted before removal.
+        """
+        position = {filename: row for row, filename in enumerate(current)}
+        sequence = [position[filename] for filename in target]
+
+        # Patience sorting for the longest increasing subsequence
+        tails = []
+        tail_items = []
+        parents = [-1] * len(sequence)
+        for i, value in enumerate(sequence):
+            slot = bisect.bisect_left(tails, value)
+            if slot == len(tails):
+                tails.append(value)
+                tail_items.append(i)
+            else:
+                tails[slot] = value
+                tail_items[slot] = i
+            parents[i] = tail_items[slot - 1] if slot else -1
+
+        if len(sequence) - len(tails) > limit:
+            return None
+
+        keep = set()
+        i = tail_items[-1] if tail_items else -1
+        while i >= 0:
+            keep.add(i)
+            i = parents[i]
+
+        rows = list(current)
+        moves = []
+        for i, filename in enumerate(target):
+            if i in keep:
+                continue
+            source = rows.index(filename)
+            destination = rows.index(target[i - 1]) + 1 if i else 0
+            if destination in (source, source + 1):
+                continue
+            moves.append((source, destination))
+            rows.insert(destination - 1 if source < destination else destination, rows.pop(source))
+        return moves
+
+    @staticmethod
+    def _runs(rows):
+        """Group ascending row numbers into (first, last) runs of consecutive rows"""
+        runs = []
+        for row in rows:
+            if runs and runs[-1][1] == row - 1:
+                runs[-1][1] = row
+            else:
+                runs.append([row, row])
+        return [tuple(run) for run in runs]
@@ -0,0 +1,139 @@
+from array import array
+import os
+import sys
+
+
+class StringPool:
+    """Interned strings addressed by small integer ids; ids stay valid until clear()"""
+
+    def __init__(self):
+        self._strings = []
+        self._ids = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __getitem__(self, string_id):
+        return self._strings[string_id]
+
+    def intern(self, text):
+        string_id = self._ids.get(text)
+        if string_id is None:
+            string_id = self._ids[text] = len(self._strings)
+            self._strings.append(sys.intern(text))
+        return string_id
+
+
+class TrackTable:
+    """Columnar store of track metadata for the whole library
+
+    Each track is a row: its title in a list, artist and album as ids into a
+    shared string pool, and its duration in an array of unsigned ints. Titles
+    that are just the file name are not stored at all. A removed row is
+    filled with the last one so the columns stay dense. get() builds the
+    metadata dict other components expect; the single-field accessors read
+    the columns directly.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self._rows = {}                # Filename to row number
+        self._files = []
+        self._titles = []              # None where the title is the file name
+        self._artists = array('I')     # String pool ids
+        self._albums = array('I')
+        self._durations = array('I')   # Seconds
+        self._strings = StringPool()
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, filename):
+        return filename in self._rows
+
+    @staticmethod
+    def _default_title(filename):
+        return os.path.basename(filename).replace('.mp3', '')
+
+    def put(self, filename, metadata):
+        """Insert or overwrite the row of a track"""
+        title = metadata["title"]
+        if title == self._default_title(filename):
+            title = None
+        artist = self._strings.intern(metadata["artist"])
+        album = self._strings.intern(metadata["album"])
+        duration = max(int(metadata["duration"]), 0)
+
+        row = self._rows.get(filename)
+        if row is None:
+            self._rows[filename] = len(self._files)
+            self._files.append(filename)
+            self._titles.append(title)
+            self._artists.append(artist)
+            self._albums.append(album)
+            self._durations.append(duration)
+        else:
+            self._titles[row] = title
+            self._artists[row] = artist
+            self._albums[row] = album
+            self._durations[row] = duration
+
+    def pop(self, filename):
+        """Remove a track's row; True if it was present"""
+        row = self._rows.pop(filename, None)
+        if row is None:
+            return False
+
+        last = len(self._files) - 1
+        if row != last:
+            moved = self._files[last]
+            self._rows[moved] = row
+            for column in (self._files, self._titles, self._artists, self._albums, self._durations):
+                column[row] = column[last]
+        for column in (self._files, self._titles, self._artists, self._albums, self._durations):
+            del column[last]
+        return True
+
+    def get(self, filename):
+        """Metadata dict of a track, or None if it has no row"""
+        row = self._rows.get(filename)
+        if row is None:
+            return None
+        title = self._titles[row]
+        return {
+            "title": title if title is not None else self._default_title(filename),
+            "artist": self._strings[self._artists[row]],
+            "album": self._strings[self._albums[row]],
+            "duration": self._durations[row]
+        }
+
+    def title(self, filename):
+        title = self._titles[self._rows[filename]]
+        return title if title is not None else self._default_title(filename)
+
+    def artist(self, filename):
+        return self._strings[self._artists[self._rows[filename]]]
+
+    def album(self, filename):
+        return self._strings[self._albums[self._rows[filename]]]
+
+    def duration(self, filename):
+        return self._durations[self._rows[filename]]
+
+    def stats(self):
+        """Row count and approximate memory used by the columns and the string pool"""
+        size = sys.getsizeof(self._rows) + sys.getsizeof(self._files) + sys.getsizeof(self._titles)
+        size += sum(sys.getsizeof(title) for title in self._titles if title is not None)
+        size += sum(sys.getsizeof(row) for row in self._rows.values())
+        for column in (self._artists, self._albums, self._durations):
+            size += column.itemsize * len(column)
+        size += sys.getsizeof(self._strings._strings) + sys.getsizeof(self._strings._ids)
+        size += sum(sys.getsizeof(text) for text in self._strings._strings)
+        return {
+            "entries": len(self._files),
+            "strings": len(self._strings),
+            "bytes": size,
+            "bytes_per_track": size / len(self._files) if self._files else 0.0
+        }
@@ -0,0 +1,75 @@
+"""Compare memory per track of the columnar TrackTable with one dict per track
+
+Usage: python benchmarks/track_table_memory.py [track count]
+"""
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.track_table import TrackTable
+
+
+def make_library(count):
+    """Synthetic library: 20 tracks per album, 4 albums per artist, some untagged files"""
+    rng = random.Random(1)
+    tracks = []
+    for i in range(count):
+        album = i // 20
+        artist = album // 4
+        filename = f"Artist {artist}/Album {album}/{i % 20 + 1:02d} Track {i}.mp3"
+        tagged = i % 10 != 0
+        tracks.append((filename, {
+            "title": f"Song title number {i}" if tagged else f"{i % 20 + 1:02d} Track {i}",
+            "artist": f"Artist name {artist}" if tagged else "Unknown Artist",
+            "album": f"Album name {album}" if tagged else "Unknown Album",
+            "duration": rng.randint(90, 600)
+        }))
+    return tracks
+
+
+def fresh_rows(tracks):
+    """Rows with newly allocated strings, as if each file had just been parsed"""
+    for filename, metadata in tracks:
+        yield filename, {key: (value + '.')[:-1] if isinstance(value, str) else value
+                         for key, value in metadata.items()}
+
+
+def measure(build, tracks):
+    """Bytes still allocated after building a store from freshly parsed rows"""
+    tracemalloc.start()
+    store = build(fresh_rows(tracks))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, store
+
+
+def build_dicts(rows):
+    return {filename: metadata for filename, metadata in rows}
+
+
+def build_table(rows):
+    table = TrackTable()
+    for filename, metadata in rows:
+        table.put(filename, metadata)
+    return table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    tracks = make_library(count)
+
+    dict_bytes, _ = measure(build_dicts, tracks)
+    table_bytes, table = measure(build_table, tracks)
+
+    # File names are shared with the playlist and indexes, so neither figure includes them
+    print(f"{count} tracks")
+    print(f"dict per track:  {dict_bytes / count:7.1f} bytes/track")
+    print(f"TrackTable:      {table_bytes / count:7.1f} bytes/track "
+          f"({table.stats()['strings']} pooled strings)")
+
+
+if __name__ == "__main__":
+    main()
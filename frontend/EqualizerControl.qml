@@ -21,6 +21,10 @@ Item {
     property bool systemEqualizerAvailable: equalizerManager ? equalizerManager.is_system_equalizer_available() : false
     property bool equalizerActive: equalizerManager ? equalizerManager.is_equalizer_active() : false
     
+    // Combined response of all bands, in dB at log-spaced points from 20 Hz to 20 kHz
+    property bool showResponseCurve: true
+    property var response: []
+    
     // Visual properties
     property color backgroundColor: "black"
     property color transparentColor: "transparent"
@@ -358,11 +362,57 @@ Item {
                 }
             }
 
+            // Response curve of the current band settings
+            Canvas {
+                id: responseCanvas
+                anchors {
+                    top: systemEqualizerAvailable ? systemEqContainer.bottom : noSystemEqContainer.bottom
+                    left: parent.left
+                    right: parent.right
+                    topMargin: App.Spacing.overallMargin
+                }
+                height: visible ? App.Spacing.overallMargin * 8 : 0
+                visible: showResponseCurve && response.length > 1
+
+                onPaint: {
+                    var ctx = getContext("2d")
+                    ctx.reset()
+
+                    // Zero line
+                    ctx.strokeStyle = "#424242"
+                    ctx.lineWidth = 1
+                    ctx.beginPath()
+                    ctx.moveTo(0, height / 2)
+                    ctx.lineTo(width, height / 2)
+                    ctx.stroke()
+
+                    // Points are log-spaced, so they are evenly spaced across the width
+                    var range = 15.0
+                    ctx.strokeStyle = equalizerActive || !systemEqualizerAvailable ? App.Style.accent : "#808080"
+                    ctx.lineWidth = 2
+                    ctx.beginPath()
+                    for (var i = 0; i < response.length; i++) {
+                        var x = i * width / (response.length - 1)
+                        var gain = Math.max(-range, Math.min(range, response[i]))
+                        var y = height / 2 - gain / range * (height / 2 - 2)
+                        if (i === 0) {
+                            ctx.moveTo(x, y)
+                        } else {
+                            ctx.lineTo(x, y)
+                        }
+                    }
+                    ctx.stroke()
+                }
+
+                onWidthChanged: requestPaint()
+                onHeightChanged: requestPaint()
+            }
+
             // Equalizer sliders - simplified
             Flickable {
                 id: sliderFlickable
                 anchors {
-                    top: systemEqualizerAvailable ? systemEqContainer.bottom : noSystemEqContainer.bottom
+                    top: responseCanvas.bottom
                     left: parent.left
                     right: parent.right
                     bottom: parent.bottom
@@ -533,6 +583,7 @@ Item {
         
         function onEqualizerBandsChanged(newValues) {
             values = newValues
+            updateResponse()
         }
         
         function onPresetChanged(newPreset) {
@@ -543,6 +594,14 @@ Item {
         function onEqualizerStatusChanged(isActive) {
             equalizerActive = isActive
             eqActiveSwitch.checked = isActive
+            responseCanvas.requestPaint()
+        }
+    }
+
+    function updateResponse() {
+        if (equalizerManager && showResponseCurve) {
+            response = equalizerManager.get_frequency_response()
+            responseCanvas.requestPaint()
         }
     }
 
@@ -556,6 +615,7 @@ Item {
             
             systemEqualizerAvailable = equalizerManager.is_system_equalizer_available()
             equalizerActive = equalizerManager.is_equalizer_active()
+            updateResponse()
         }
     }
 }
\ No newline at end of file
@@ -234,7 +234,7 @@ Item {
                                 mediaContentArea.currentFile = filename;
                                 
                                 // Update title
-                                mediaContentArea.currentTitle = filename.replace('.mp3', '');
+                                mediaContentArea.currentTitle = filename.split('/').pop().replace('.mp3', '');
                                 
                                 // Update artist and album
                                 mediaContentArea.currentArtist = mediaManager.get_band(filename);
@@ -10,9 +10,7 @@ Item {
     required property ApplicationWindow mainWindow
 
     // Core properties
-    property var mediaFiles: []
     property string lastPlayedSong: ""
-    property real listViewPosition: 0
     property bool isPaused: false
     
     // Add property for current library name
@@ -38,8 +36,8 @@ Item {
                             currentSortColumn === "album" ? sortByAlbumAscending : 
                             sortByArtistAscending
             
-            mediaFiles = mediaManager.sort_media_files(currentSortColumn, ascending)
-            updateTimer.restart()
+            // Rows are moved in place by the track model
+            mediaManager.sort_track_model(currentSortColumn, ascending)
         }
     }
 
@@ -52,20 +50,7 @@ Item {
                 lastPlayedSong = currentFile
                 isPaused = !mediaManager.is_playing()
             }
-            updateTimer.restart()
-        }
-    }
-
-    // Update timer for model changes
-    Timer {
-        id: updateTimer
-        interval: 50
-        repeat: false
-        onTriggered: {
-            listViewPosition = mediaListView.contentY
-            mediaListView.model = []
-            mediaListView.model = mediaFiles
-            mediaListView.contentY = listViewPosition
+            sortMediaFiles()
         }
     }
 
@@ -132,7 +117,7 @@ Item {
                         font.pixelSize: App.Spacing.mediaPlayerStatsTextSize * 1.2
                     }
                     Text {
-                        text: mediaFiles.length
+                        text: mediaListView.count
                         color: App.Style.secondaryTextColor
                         font.pixelSize: App.Spacing.mediaPlayerStatsTextSize * 1.2
                         font.bold: true
@@ -323,7 +308,7 @@ Item {
                     Layout.fillWidth: true
                     Layout.fillHeight: true
                     clip: true
-                    model: mediaFiles
+                    model: mediaManager ? mediaManager.track_model : null
                     cacheBuffer: height * 0.5
                     displayMarginBeginning: 40
                     displayMarginEnd: 40
@@ -341,22 +326,19 @@ Item {
                                 y <= mediaListView.contentY + mediaListView.height
                                 
                         // Active song properties
-                        property bool isCurrentSong: lastPlayedSong === modelData
-                        property bool isPlaying: isCurrentSong && mediaManager && mediaManager.is_playing()
+                        property bool isCurrentSong: lastPlayedSong === model.file
+                        property bool isPlaying: isCurrentSong && !mediaPlayer.isPaused
                         
                         // Properties for album art
                         property var albumArtSource: visible ? 
-                            (mediaManager ? 
-                                mediaManager.get_album_art(modelData) || 
-                                "./assets/missing_art.jpg" : 
-                                "./assets/missing_art.jpg") : 
+                            (model.art || "./assets/missing_art.jpg") : 
                             ""
                         
                         // Generate consistent value based on song name
                         property real randomValue: {
                             var hash = 0;
-                            for (var i = 0; i < modelData.length; i++) {
-                                hash = ((hash << 5) - hash) + modelData.charCodeAt(i);
+                            for (var i = 0; i < model.file.length; i++) {
+                                hash = ((hash << 5) - hash) + model.file.charCodeAt(i);
                                 hash = hash & hash;
                             }
                             return Math.abs(hash) / 2147483647;
@@ -561,7 +543,7 @@ Item {
                                             // Song title
                                             Text {
                                                 Layout.fillWidth: true
-                                                text: modelData.replace('.mp3', '')
+                                                text: model.title
                                                 color: App.Style.primaryTextColor
                                                 font.pixelSize: App.Spacing.mediaPlayerTextSize * 1.2
                                                 font.bold: true
@@ -570,9 +552,7 @@ Item {
 
                                             // Duration
                                             Text {
-                                                text: mediaManager ? 
-                                                    mediaManager.get_formatted_duration(modelData) : 
-                                                    "0:00"
+                                                text: model.duration || "0:00"
                                                 color: App.Style.secondaryTextColor
                                                 font.pixelSize: App.Spacing.mediaPlayerSecondaryTextSize * 1.1
                                                 elide: Text.ElideRight
@@ -591,9 +571,7 @@ Item {
                                         anchors.left: parent.left
                                         anchors.right: parent.right
                                         anchors.verticalCenter: parent.verticalCenter
-                                        text: mediaManager ? 
-                                            mediaManager.get_band(modelData) : 
-                                            "Unknown Artist"
+                                        text: model.artist || "Unknown Artist"
                                         color: App.Style.secondaryTextColor
                                         font.pixelSize: App.Spacing.mediaPlayerSecondaryTextSize * 1.2
                                         elide: Text.ElideRight
@@ -610,9 +588,7 @@ Item {
                                         anchors.left: parent.left
                                         anchors.right: parent.right
                                         anchors.verticalCenter: parent.verticalCenter
-                                        text: mediaManager ? 
-                                            mediaManager.get_album(modelData) : 
-                                            "Unknown Album"
+                                        text: model.album || "Unknown Album"
                                         color: App.Style.secondaryTextColor
                                         font.pixelSize: App.Spacing.mediaPlayerSecondaryTextSize * 1.2
                                         elide: Text.ElideRight
@@ -625,8 +601,8 @@ Item {
                                 anchors.fill: parent
                                 onClicked: {
                                     if (mediaManager) {
-                                        mediaManager.play_file(modelData)
-                                        lastPlayedSong = modelData
+                                        mediaManager.play_file(model.file)
+                                        lastPlayedSong = model.file
                                         stackView.push("MediaRoom.qml", {
                                             stackView: mediaPlayer.stackView
                                         })
@@ -684,24 +660,9 @@ Item {
     Connections {
         target: mediaManager
         
-        // Media list updated
-        function onMediaListChanged(files) {
-            if (mediaFiles.length !== files.length) {
-                console.log("Media list updated: " + files.length + " files");
-                mediaFiles = files;
-                
-                if (currentSortColumn !== "none") {
-                    sortMediaFiles();
-                } else {
-                    updateTimer.restart();
-                }
-            }
-        }
-        
         // Current media changed
         function onCurrentMediaChanged(filename) {
             lastPlayedSong = filename
-            updateTimer.restart()
         }
         
         // Play state changed
@@ -713,7 +674,6 @@ Item {
                     lastPlayedSong = currentFile
                 }
             }
-            updateTimer.restart()
         }
         
         // Statistics updates
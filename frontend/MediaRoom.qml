@@ -31,6 +31,34 @@ Item {
     
     property bool isShuffleEnabled: false
 
+    // Min/max peak pairs of the current track, empty until computed
+    property var waveform: []
+    property string waveformFile: ""
+
+    function loadWaveform(filename) {
+        waveformFile = filename
+        waveform = filename ? mediaManager.get_waveform(filename) : []
+    }
+
+    // Band levels of the playing audio, analysed only while shown
+    property bool showSpectrum: true
+    property var spectrum: []
+
+    function updateSpectrumActive() {
+        if (mediaManager) {
+            mediaManager.set_spectrum_active(showSpectrum && visible)
+        }
+    }
+
+    onVisibleChanged: updateSpectrumActive()
+    onShowSpectrumChanged: updateSpectrumActive()
+    Component.onCompleted: updateSpectrumActive()
+    Component.onDestruction: {
+        if (mediaManager) {
+            mediaManager.set_spectrum_active(false)
+        }
+    }
+
     function formatTime(ms) {
         var minutes = Math.floor(ms / 60000)
         var seconds = Math.floor((ms % 60000) / 1000)
@@ -123,6 +151,7 @@ Item {
                 var currentFile = mediaManager.get_current_file()
                 if (currentFile) {
                     currentSongText.text = currentFile
+                    mediaRoom.loadWaveform(currentFile)
                 }
                 isShuffleEnabled = mediaManager.is_shuffled()
             }
@@ -647,7 +676,7 @@ Item {
                                 Text {
                                     id: songTitleText
                                     y: (parent.height - height) / 2 // Center vertically
-                                    text: currentSongText.text ? currentSongText.text.replace('.mp3', '') : "No track selected"
+                                    text: currentSongText.text ? currentSongText.text.split('/').pop().replace('.mp3', '') : "No track selected"
                                     color: App.Style.metadataColor
                                     font.pixelSize: App.Spacing.mediaRoomMetaDataSongText
                                     font.bold: true
@@ -798,6 +827,34 @@ Item {
             }
         }
 
+        Canvas { // Spectrum, just above the duration bar
+            id: spectrumCanvas
+            width: durationBar.width
+            height: App.Spacing.mediaRoomDurationBarHeight
+            anchors {
+                bottom: durationBar.top
+                horizontalCenter: parent.horizontalCenter
+            }
+            visible: showSpectrum && spectrum.length > 0
+            opacity: 0.6
+
+            onPaint: {
+                var ctx = getContext("2d")
+                ctx.reset()
+                var count = spectrum.length
+                if (count === 0) {
+                    return
+                }
+                var slot = width / count
+                var barWidth = Math.max(1, slot * 0.7)
+                ctx.fillStyle = accent
+                for (var i = 0; i < count; i++) {
+                    var barHeight = spectrum[i] * height
+                    ctx.fillRect(i * slot + (slot - barWidth) / 2, height - barHeight, barWidth, barHeight)
+                }
+            }
+        }
+
         Rectangle { //duration bar
             id: durationBar
             width: parent.width * 0.75
@@ -885,13 +942,63 @@ Item {
                         width: progressSlider.availableWidth
                         height: App.Spacing.mediaRoomProgressSliderHeight
                         radius: height / 2
-                        color: App.Style.secondaryTextColor
+                        color: mediaRoom.waveform.length > 0 ? transparentColor : App.Style.secondaryTextColor
 
                         Rectangle {
                             width: progressSlider.visualPosition * parent.width
                             height: parent.height
                             radius: height / 2
-                            color: App.Style.primaryTextColor
+                            color: mediaRoom.waveform.length > 0 ? transparentColor : App.Style.primaryTextColor
+                        }
+
+                        // Precomputed peaks; the played part is drawn like the filled bar
+                        Canvas {
+                            id: waveformCanvas
+                            width: parent.width
+                            height: progressSlider.availableHeight
+                            y: (parent.height - height) / 2
+                            visible: mediaRoom.waveform.length > 0
+                            property int playedBars: -1
+
+                            onPaint: {
+                                var ctx = getContext("2d")
+                                ctx.reset()
+                                var peaks = mediaRoom.waveform
+                                var bars = peaks.length / 2
+                                if (bars === 0)
+                                    return
+                                var middle = height / 2
+                                var step = width / bars
+                                for (var i = 0; i < bars; i++) {
+                                    var top = middle - peaks[2 * i + 1] * middle
+                                    var bottom = middle - peaks[2 * i] * middle
+                                    ctx.fillStyle = i < playedBars ? App.Style.primaryTextColor : App.Style.secondaryTextColor
+                                    ctx.fillRect(i * step, top, Math.max(step - 0.5, 0.5), Math.max(bottom - top, 1))
+                                }
+                            }
+
+                            function updatePlayed() {
+                                // Repaint only when the played edge crosses into another bar
+                                var bars = Math.floor(progressSlider.visualPosition * mediaRoom.waveform.length / 2)
+                                if (bars !== playedBars) {
+                                    playedBars = bars
+                                    requestPaint()
+                                }
+                            }
+
+                            Connections {
+                                target: progressSlider
+                                function onVisualPositionChanged() { waveformCanvas.updatePlayed() }
+                            }
+                            Connections {
+                                target: mediaRoom
+                                function onWaveformChanged() {
+                                    waveformCanvas.playedBars = -1
+                                    waveformCanvas.updatePlayed()
+                                }
+                            }
+                            onWidthChanged: requestPaint()
+                            onHeightChanged: requestPaint()
                         }
                     }
 
@@ -995,10 +1102,22 @@ Item {
             mediaRoom.position = 0
             progressSlider.value = 0
             currentSongText.text = filename            
+            mediaRoom.loadWaveform(filename)
+        }
+
+        function onWaveformReady(filename) {
+            if (filename === mediaRoom.waveformFile) {
+                mediaRoom.loadWaveform(filename)
+            }
         }
         function onShuffleStateChanged(enabled) {
             isShuffleEnabled = enabled
         }
+
+        function onSpectrumChanged(levels) {
+            mediaRoom.spectrum = levels
+            spectrumCanvas.requestPaint()
+        }
     }
     
     Connections {
@@ -1164,6 +1164,41 @@ Item {
                             
                             SettingsDivider {}
 
+                            // Subfolder Scanning Toggle
+                            ColumnLayout {
+                                Layout.fillWidth: true
+                                spacing: App.Spacing.rowSpacing
+                                
+                                SettingLabel {
+                                    text: "Scan Subfolders"
+                                }
+                                
+                                SettingsToggle {
+                                    id: scanSubfoldersToggle
+                                    Layout.fillWidth: true
+                                    text: "Include music in nested Artist/Album folders"
+                                    checked: settingsManager ? settingsManager.scanSubfolders : false
+                                    activeColor: App.Style.accent
+                                    inactiveColor: App.Style.hoverColor
+                                    
+                                    onToggled: {
+                                        if (settingsManager) {
+                                            settingsManager.save_scan_subfolders(checked)
+                                        }
+                                    }
+                                    
+                                    // Update when setting changes externally
+                                    Connections {
+                                        target: settingsManager
+                                        function onScanSubfoldersChanged() {
+                                            scanSubfoldersToggle.checked = settingsManager.scanSubfolders
+                                        }
+                                    }
+                                }
+                            }
+                            
+                            SettingsDivider {}
+
                             // Startup Volume
                             ColumnLayout {
                                 Layout.fillWidth: true
@@ -15,53 +15,61 @@ from backend.equalizer_manager import EqualizerManager  # Import the equalizer m
 from backend.svg_manager import SVGManager
 from backend.obd_manager import OBDManager
 
-# Check system type
 import platform
-system_name = platform.system()
-print(f"Detected operating system: {system_name}")
 
-app = QApplication(sys.argv)
-engine = QQmlApplicationEngine()
 
-engine.addImportPath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"))
+def main():
+    # Check system type
+    system_name = platform.system()
+    print(f"Detected operating system: {system_name}")
 
-# Settings Manager
-settings_manager = SettingsManager()
-engine.rootContext().setContextProperty("settingsManager", settings_manager)
+    app = QApplication(sys.argv)
+    engine = QQmlApplicationEngine()
 
-# Clock
-clock = Clock(settings_manager)
-engine.rootContext().setContextProperty("clock", clock)
+    engine.addImportPath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend"))
 
-# Media Manager
-media_manager = MediaManager()
-engine.rootContext().setContextProperty("mediaManager", media_manager)
+    # Settings Manager
+    settings_manager = SettingsManager()
+    engine.rootContext().setContextProperty("settingsManager", settings_manager)
 
-# Equalizer Manager - initialize with a reference to media_manager
-equalizer_manager = EqualizerManager(media_manager)
-engine.rootContext().setContextProperty("equalizerManager", equalizer_manager)
+    # Clock
+    clock = Clock(settings_manager)
+    engine.rootContext().setContextProperty("clock", clock)
 
-# Connect equalizer to media manager (if the connection method exists)
-if hasattr(media_manager, 'connect_equalizer'):
-    media_manager.connect_equalizer(equalizer_manager)
+    # Media Manager
+    media_manager = MediaManager()
+    engine.rootContext().setContextProperty("mediaManager", media_manager)
+    engine.addImageProvider("albumart", media_manager.album_art_provider)
 
+    # Equalizer Manager - initialize with a reference to media_manager
+    equalizer_manager = EqualizerManager(media_manager)
+    engine.rootContext().setContextProperty("equalizerManager", equalizer_manager)
 
-# SVG Manager
-svg_manager = SVGManager()
-engine.rootContext().setContextProperty("svgManager", svg_manager)
+    # Connect equalizer to media manager (if the connection method exists)
+    if hasattr(media_manager, 'connect_equalizer'):
+        media_manager.connect_equalizer(equalizer_manager)
 
-# OBD Manager
-obd_manager = OBDManager(settings_manager)
-engine.rootContext().setContextProperty("obdManager", obd_manager)
 
-# Add the cleanup connection after creating media_manager:
-app.aboutToQuit.connect(media_manager._clear_temp_files)
+    # SVG Manager
+    svg_manager = SVGManager()
+    engine.rootContext().setContextProperty("svgManager", svg_manager)
 
-# Update the path to Main.qml
-qml_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "Main.qml")
-engine.load(QUrl.fromLocalFile(qml_file))
+    # OBD Manager
+    obd_manager = OBDManager(settings_manager)
+    engine.rootContext().setContextProperty("obdManager", obd_manager)
 
-if not engine.rootObjects():
-    sys.exit(-1)
+    app.aboutToQuit.connect(equalizer_manager.shutdown)
 
-sys.exit(app.exec())
\ No newline at end of file
+    # Update the path to Main.qml
+    qml_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend", "Main.qml")
+    engine.load(QUrl.fromLocalFile(qml_file))
+
+    if not engine.rootObjects():
+        sys.exit(-1)
+
+    sys.exit(app.exec())
+
+
+# Audio analysis worker processes import this module; only the main process runs the app
+if __name__ == "__main__":
+    main()